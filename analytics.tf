@@ -14,33 +14,28 @@ resource "aws_s3_object" "glue_script" {
   etag   = filemd5("${path.module}/glue_scripts/etl_job.py")
 }
 
-# Glue Crawler
-resource "aws_glue_crawler" "s3_crawler" {
-  database_name = aws_glue_catalog_database.analytics_db.name
-  name          = "${local.name_prefix}-crawler"
-  role          = aws_iam_role.glue_service.arn
-
-  s3_target {
-    path = "s3://${aws_s3_bucket.data_lake.id}/raw-data/"
-  }
-
-  s3_target {
-    path = "s3://${aws_s3_bucket.data_lake.id}/processed-data/"
-  }
-
-  schema_change_policy {
-    delete_behavior = "LOG"
-    update_behavior = "UPDATE_IN_DATABASE"
-  }
+# Table layout module imported by the ETL job (explicit schemas + partition projection)
+resource "aws_s3_object" "glue_table_layout" {
+  bucket = aws_s3_bucket.data_lake.id
+  key    = "glue-scripts/table_layout.py"
+  source = "${path.module}/glue_scripts/table_layout.py"
+  etag   = filemd5("${path.module}/glue_scripts/table_layout.py")
+}
 
-  configuration = jsonencode({
-    Version = 1.0
-    Grouping = {
-      TableGroupingPolicy = "CombineCompatibleSchemas"
-    }
-  })
+# Summary table aggregations imported by the ETL job
+resource "aws_s3_object" "glue_summary_tables" {
+  bucket = aws_s3_bucket.data_lake.id
+  key    = "glue-scripts/summary_tables.py"
+  source = "${path.module}/glue_scripts/summary_tables.py"
+  etag   = filemd5("${path.module}/glue_scripts/summary_tables.py")
+}
 
-  tags = local.common_tags
+# Approximate analytics module imported by the ETL job (stratified sampling)
+resource "aws_s3_object" "glue_approx_analytics" {
+  bucket = aws_s3_bucket.data_lake.id
+  key    = "glue-scripts/approx_analytics.py"
+  source = "${path.module}/glue_scripts/approx_analytics.py"
+  etag   = filemd5("${path.module}/glue_scripts/approx_analytics.py")
 }
 
 # Glue ETL Job
@@ -60,6 +55,9 @@ resource "aws_glue_job" "etl_job" {
     "--TempDir"                          = "s3://${aws_s3_bucket.data_lake.id}/temp/"
     "--DATABASE_NAME"                    = aws_glue_catalog_database.analytics_db.name
     "--S3_BUCKET"                        = aws_s3_bucket.data_lake.id
+    "--extra-py-files"                   = join(",", [for key in [aws_s3_object.glue_table_layout.key, aws_s3_object.glue_summary_tables.key, aws_s3_object.glue_approx_analytics.key] : "s3://${aws_s3_bucket.data_lake.id}/${key}"])
+    "--APPROX_SAMPLE_FRACTION"           = var.approx_sample_fraction
+    "--APPROX_ONLY"                      = tostring(var.approx_only)
   }
 
   max_retries       = 1
@@ -94,20 +92,3 @@ resource "aws_athena_workgroup" "analytics" {
 
   tags = local.common_tags
 }
-
-
-# Schedule crawler to run every hour
-resource "aws_glue_trigger" "crawler_schedule" {
-  name     = "${local.name_prefix}-crawler-trigger"
-  type     = "SCHEDULED"
-  schedule = "cron(0 * * * ? *)" # Every hour
-  # Alternative schedules:
-  # schedule = "cron(0 0/6 * * ? *)"  # Every 6 hours
-  # schedule = "cron(0 0 * * ? *)"     # Daily at midnight
-
-  actions {
-    crawler_name = aws_glue_crawler.s3_crawler.name
-  }
-
-  tags = local.common_tags
-}
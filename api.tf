@@ -65,6 +65,83 @@ resource "aws_lambda_permission" "api_gateway" {
   source_arn    = "${aws_api_gateway_rest_api.data_ingestion.execution_arn}/*/*"
 }
 
+# Query API routes: GET /orders/{customer_id} and GET /analytics/{table_name}
+resource "aws_api_gateway_resource" "orders" {
+  rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
+  parent_id   = aws_api_gateway_rest_api.data_ingestion.root_resource_id
+  path_part   = "orders"
+}
+
+resource "aws_api_gateway_resource" "customer_orders" {
+  rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
+  parent_id   = aws_api_gateway_resource.orders.id
+  path_part   = "{customer_id}"
+}
+
+# Order history carries customer PII and customer IDs are guessable, so
+# callers must sign requests (SigV4) with the orders_api_invoke policy
+resource "aws_api_gateway_method" "customer_orders_get" {
+  rest_api_id   = aws_api_gateway_rest_api.data_ingestion.id
+  resource_id   = aws_api_gateway_resource.customer_orders.id
+  http_method   = "GET"
+  authorization = "AWS_IAM"
+
+  request_parameters = {
+    "method.request.path.customer_id" = true
+  }
+}
+
+resource "aws_api_gateway_integration" "customer_orders_integration" {
+  rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
+  resource_id = aws_api_gateway_resource.customer_orders.id
+  http_method = aws_api_gateway_method.customer_orders_get.http_method
+
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.query_api.invoke_arn
+}
+
+resource "aws_api_gateway_resource" "analytics" {
+  rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
+  parent_id   = aws_api_gateway_rest_api.data_ingestion.root_resource_id
+  path_part   = "analytics"
+}
+
+resource "aws_api_gateway_resource" "analytics_table" {
+  rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
+  parent_id   = aws_api_gateway_resource.analytics.id
+  path_part   = "{table_name}"
+}
+
+resource "aws_api_gateway_method" "analytics_get" {
+  rest_api_id   = aws_api_gateway_rest_api.data_ingestion.id
+  resource_id   = aws_api_gateway_resource.analytics_table.id
+  http_method   = "GET"
+  authorization = "NONE"
+
+  request_parameters = {
+    "method.request.path.table_name" = true
+  }
+}
+
+resource "aws_api_gateway_integration" "analytics_integration" {
+  rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
+  resource_id = aws_api_gateway_resource.analytics_table.id
+  http_method = aws_api_gateway_method.analytics_get.http_method
+
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.query_api.invoke_arn
+}
+
+resource "aws_lambda_permission" "api_gateway_query" {
+  statement_id  = "AllowAPIGatewayInvokeQuery"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.query_api.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.data_ingestion.execution_arn}/*/*"
+}
+
 # Deployment with proper stage and dependencies
 resource "aws_api_gateway_deployment" "production" {
   rest_api_id = aws_api_gateway_rest_api.data_ingestion.id
@@ -74,7 +151,10 @@ resource "aws_api_gateway_deployment" "production" {
     aws_api_gateway_integration.lambda_integration,
     aws_api_gateway_method_response.generate_200,
     aws_api_gateway_integration_response.generate,
-    aws_lambda_permission.api_gateway
+    aws_lambda_permission.api_gateway,
+    aws_api_gateway_integration.customer_orders_integration,
+    aws_api_gateway_integration.analytics_integration,
+    aws_lambda_permission.api_gateway_query
   ]
 
   # Force new deployment when configuration changes
@@ -85,6 +165,10 @@ resource "aws_api_gateway_deployment" "production" {
       aws_api_gateway_integration.lambda_integration.id,
       aws_api_gateway_method_response.generate_200.id,
       aws_api_gateway_integration_response.generate.id,
+      aws_api_gateway_method.customer_orders_get.id,
+      aws_api_gateway_integration.customer_orders_integration.id,
+      aws_api_gateway_method.analytics_get.id,
+      aws_api_gateway_integration.analytics_integration.id,
     ]))
   }
 
@@ -42,6 +42,11 @@ data "archive_file" "stream_processor" {
     content  = file("${path.module}/lambda_functions/stream_processor.py")
     filename = "lambda_function.py"
   }
+
+  source {
+    content  = file("${path.module}/lambda_functions/customer_orders.py")
+    filename = "customer_orders.py"
+  }
 }
 
 resource "aws_lambda_function" "stream_processor" {
@@ -58,6 +63,7 @@ resource "aws_lambda_function" "stream_processor" {
     variables = {
       S3_BUCKET             = aws_s3_bucket.data_lake.id
       DYNAMODB_ORDERS_TABLE = aws_dynamodb_table.orders.name
+      ORDERS_WRITE_SHARDS   = var.orders_write_shards
     }
   }
 
@@ -77,3 +83,43 @@ resource "aws_lambda_event_source_mapping" "kinesis_lambda" {
     aws_iam_role_policy_attachment.lambda_kinesis
   ]
 }
+
+# Query API Lambda (read side: customer order history and analytics results)
+data "archive_file" "query_api" {
+  type        = "zip"
+  output_path = "${path.module}/lambda_packages/query_api.zip"
+
+  source {
+    content  = file("${path.module}/lambda_functions/query_api.py")
+    filename = "lambda_function.py"
+  }
+
+  source {
+    content  = file("${path.module}/lambda_functions/customer_orders.py")
+    filename = "customer_orders.py"
+  }
+}
+
+resource "aws_lambda_function" "query_api" {
+  filename         = data.archive_file.query_api.output_path
+  function_name    = "${local.name_prefix}-query-api"
+  role             = aws_iam_role.lambda_execution.arn
+  handler          = "lambda_function.lambda_handler"
+  source_code_hash = data.archive_file.query_api.output_base64sha256
+  runtime          = "python3.11"
+  timeout          = 30
+  memory_size      = local.lambda_memory
+
+  environment {
+    variables = {
+      S3_BUCKET             = aws_s3_bucket.data_lake.id
+      DYNAMODB_ORDERS_TABLE = aws_dynamodb_table.orders.name
+      ORDERS_WRITE_SHARDS   = var.orders_write_shards
+      ORDERS_READ_SHARDS    = local.orders_read_shards
+      CACHE_TTL_SECONDS     = var.query_cache_ttl_seconds
+      CACHE_MAX_ENTRIES     = var.query_cache_max_entries
+    }
+  }
+
+  tags = local.common_tags
+}
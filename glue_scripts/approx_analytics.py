@@ -0,0 +1,361 @@
+"""
+Stratified sampling and approximate analytics for dashboard previews.
+
+When APPROX_SAMPLE_FRACTION is set, the ETL job keeps a stratified sample of
+processed orders (strata: order date x category x customer segment) under
+analytics-results/orders_sample/. Each sampled row carries its stratum's
+population and realized sample size, so the summary tables can be estimated
+from the sample with 95% margins of error (stratified expansion estimators
+with finite population correction; averages use the linearized ratio
+variance). The job writes those estimates as the approx_<table> tables.
+
+The estimators only need, per (group, stratum), the sample row count and the
+sums and sums of squares of each metric. The job computes those in Spark
+(build_stratum_aggregates) and finishes the estimates on the driver from
+these small aggregates (estimate_summary).
+
+Max/min come straight from the sample without a margin of error. Distinct
+counts do not scale from a per-row sample (a customer's other orders are
+mostly not sampled), so they and the ratios built on them are NULL in the
+approx_<table> tables; read them from the exact tables.
+"""
+import math
+import random
+from collections import defaultdict
+
+from summary_tables import SUMMARIES
+
+
+Z_95 = 1.96
+
+# Aggregates whose estimates come with a <metric>_moe column
+MOE_AGGREGATES = ("count", "sum", "avg")
+
+# Larger samples cost nearly as much as the exact tables and the single
+# orders_sample/ file grows with them
+MAX_SAMPLE_FRACTION = 0.2
+
+# Groups with fewer sample rows get a NULL <metric>_moe: with a handful of
+# rows per stratum the sample variance is too unstable for a 95% interval
+MIN_MOE_ROWS = 30
+
+
+def stratum_id(row):
+    """
+    Stratum key of a processed order: order date x category x customer segment
+    """
+    order_date = str(row.get("order_timestamp") or row.get("order_date") or "")[:10]
+    return "|".join([order_date or "unknown",
+                     row.get("category") or "unknown",
+                     row.get("customer_segment") or "unknown"])
+
+
+def allocation(population, fraction, min_per_stratum):
+    """
+    Expected sample size of a stratum: proportional, with a floor so small
+    strata still get a variance estimate
+    """
+    # Half-up rounding, matching Spark's round() in build_stratified_sample
+    return min(population, max(min_per_stratum, int(population * fraction + 0.5)))
+
+
+def oversample_probability(population, size):
+    """
+    Inclusion probability of the Bernoulli pre-sample: large enough that a
+    stratum almost never yields fewer than `size` candidates (mean plus three
+    standard deviations, plus slack for very small strata)
+    """
+    return min(1.0, (size + 3 * math.sqrt(size) + 5) / population)
+
+
+def _with_stratum(row, key, population, size):
+    return {
+        **row,
+        "stratum_id": key,
+        "stratum_population": population,
+        "stratum_sample_size": size,
+        "sample_weight": population / size,
+    }
+
+
+def stratified_sample(rows, fraction, min_per_stratum=2, seed=42):
+    """
+    Draw a stratified sample from in-memory rows (same scheme as build_stratified_sample)
+    """
+    rng = random.Random(seed)
+    strata = defaultdict(list)
+    for row in rows:
+        strata[stratum_id(row)].append(row)
+
+    sample = []
+    for key, members in strata.items():
+        population = len(members)
+        size = allocation(population, fraction, min_per_stratum)
+        probability = oversample_probability(population, size)
+        candidates = [row for row in members if rng.random() < probability]
+        rng.shuffle(candidates)
+        chosen = candidates[:size]
+        sample.extend(_with_stratum(row, key, population, len(chosen)) for row in chosen)
+    return sample
+
+
+def build_stratified_sample(df, fraction, min_per_stratum=2, seed=42):
+    """
+    Spark version of stratified_sample() for the Glue job.
+
+    Stratum sizes come from one aggregation broadcast back to the rows; a
+    Bernoulli filter then keeps a few more candidates than each stratum
+    needs, and only those candidates are ranked to cut each stratum to its
+    allocated size. The orders themselves are never sorted or shuffled.
+    Estimates use the realized sample size, which is below the allocation
+    only when a stratum draws too few candidates (rare by construction).
+    """
+    from pyspark.sql import Window
+    from pyspark.sql import functions as F
+
+    df = df.withColumn("stratum_id", F.concat_ws(
+        "|",
+        F.coalesce(F.date_format("order_timestamp", "yyyy-MM-dd"), F.lit("unknown")),
+        F.coalesce(F.col("category"), F.lit("unknown")),
+        F.coalesce(F.col("customer_segment"), F.lit("unknown"))))
+
+    population = F.col("stratum_population")
+    allocated = F.col("_allocated")
+    strata = df.groupBy("stratum_id") \
+        .agg(F.count(F.lit(1)).alias("stratum_population")) \
+        .withColumn("_allocated", F.least(
+            population,
+            F.greatest(F.lit(min_per_stratum), F.round(population * fraction).cast("long")))) \
+        .withColumn("_probability", F.least(
+            F.lit(1.0), (allocated + F.sqrt(allocated) * 3 + 5) / population))
+
+    stratum = Window.partitionBy("stratum_id")
+    return df.join(F.broadcast(strata), "stratum_id") \
+        .filter(F.rand(seed) < F.col("_probability")) \
+        .withColumn("_candidates", F.count(F.lit(1)).over(stratum)) \
+        .withColumn("_sample_rank", F.row_number().over(stratum.orderBy(F.rand(seed + 1)))) \
+        .filter(F.col("_sample_rank") <= allocated) \
+        .withColumn("stratum_sample_size", F.least(allocated, F.col("_candidates"))) \
+        .withColumn("sample_weight", population / F.col("stratum_sample_size")) \
+        .drop("_allocated", "_probability", "_candidates", "_sample_rank")
+
+
+def _number(value):
+    if value is None:
+        return None
+    return float(value)
+
+
+def _aggregate_fields(spec):
+    """
+    (column, kind, metric name, source field) of the per-stratum aggregates a
+    summary table's estimates are finished from
+    """
+    fields = [("sample_rows", "rows", None, None)]
+    for name, aggregate, field in spec["metrics"]:
+        if aggregate == "sum":
+            fields += [(f"{name}__s", "sum", name, field), (f"{name}__ss", "sum_sq", name, field)]
+        elif aggregate == "avg":
+            fields += [(f"{name}__m", "present", name, field), (f"{name}__s", "sum", name, field),
+                       (f"{name}__ss", "sum_sq", name, field)]
+        elif aggregate in ("max", "min"):
+            fields.append((f"{name}__x", aggregate, name, field))
+    return fields
+
+
+def stratum_aggregates(sample_rows, table_name):
+    """
+    Per (group, stratum) row count and sums / sums of squares of the metric
+    values over in-memory sample rows (same output as build_stratum_aggregates)
+    """
+    spec = SUMMARIES[table_name]
+    grouped = defaultdict(list)
+    for row in sample_rows:
+        key = tuple(row.get(k) for k in spec["keys"]) + (row["stratum_id"],)
+        grouped[key].append(row)
+
+    output = []
+    for key, rows in grouped.items():
+        out = dict(zip(spec["keys"] + ["stratum_id"], key))
+        out["stratum_population"] = rows[0]["stratum_population"]
+        out["stratum_sample_size"] = rows[0]["stratum_sample_size"]
+        for column, kind, _, field in _aggregate_fields(spec):
+            values = [_number(r.get(field)) for r in rows] if field else []
+            present = [v for v in values if v is not None]
+            if kind == "rows":
+                out[column] = len(rows)
+            elif kind == "present":
+                out[column] = len(present)
+            elif kind in ("sum", "sum_sq"):
+                power = 1 if kind == "sum" else 2
+                # Spark's sum() is NULL over no values; sum metrics count NULLs as 0
+                out[column] = sum(v ** power for v in present) if present else None
+            else:
+                out[column] = (max if kind == "max" else min)(present, default=None)
+        output.append(out)
+    return output
+
+
+def build_stratum_aggregates(sample_df, table_name):
+    """
+    Spark version of stratum_aggregates() for the Glue job: one small row
+    per (group, stratum), so only these aggregates reach the driver
+    """
+    from pyspark.sql import functions as F
+
+    spec = SUMMARIES[table_name]
+    types = dict(sample_df.dtypes)
+
+    def value(field):
+        column = F.col(field)
+        if types.get(field) == "boolean":
+            column = F.when(column, 1.0).when(~column, 0.0)
+        return column.cast("double")
+
+    aggregates = []
+    for column, kind, _, field in _aggregate_fields(spec):
+        if kind == "rows":
+            aggregates.append(F.count(F.lit(1)).alias(column))
+        elif kind == "present":
+            aggregates.append(F.count(value(field)).alias(column))
+        elif kind == "sum":
+            aggregates.append(F.sum(value(field)).alias(column))
+        elif kind == "sum_sq":
+            aggregates.append(F.sum(value(field) * value(field)).alias(column))
+        else:
+            aggregates.append(getattr(F, kind)(value(field)).alias(column))
+
+    return sample_df.groupBy(
+        *spec["keys"], "stratum_id", "stratum_population", "stratum_sample_size"
+    ).agg(*aggregates)
+
+
+def _expand(strata):
+    """
+    Stratified estimate of a population total and its variance from
+    (population, sample size, sum, sum of squares) per stratum.
+
+    Sample rows outside the group count as zeros in their stratum, which is
+    what the sums of squares assume since only group rows contribute.
+    """
+    total = variance = 0.0
+    for population, size, s, ss in strata:
+        total += population / size * s
+        if size > 1:
+            s2 = max(ss - s * s / size, 0.0) / (size - 1)
+            variance += population * population * (1 - size / population) * s2 / size
+    return total, variance
+
+
+def _margin(variance):
+    return Z_95 * math.sqrt(variance)
+
+
+def _estimate_group(strata_rows, metrics):
+    result = {}
+    sample_rows = sum(r["sample_rows"] for r in strata_rows)
+    # Few sample rows per stratum understate the variance, so the margin
+    # of error is only reported where there is enough data behind it
+    with_margin = sample_rows >= MIN_MOE_ROWS
+
+    def sizes(r):
+        return r["stratum_population"], r["stratum_sample_size"]
+
+    for name, aggregate, field in metrics:
+        if aggregate == "count":
+            total, variance = _expand(
+                (*sizes(r), r["sample_rows"], r["sample_rows"]) for r in strata_rows)
+            result[name] = int(round(total))
+            result[f"{name}_moe"] = _margin(variance) if with_margin else None
+
+        elif aggregate == "sum":
+            total, variance = _expand(
+                (*sizes(r), r[f"{name}__s"] or 0.0, r[f"{name}__ss"] or 0.0) for r in strata_rows)
+            result[name] = total
+            result[f"{name}_moe"] = _margin(variance) if with_margin else None
+
+        elif aggregate == "avg":
+            # Ratio estimator over non-null values, as Spark's avg() ignores nulls
+            present = [r for r in strata_rows if r[f"{name}__m"]]
+            if not present:
+                result[name] = None
+                result[f"{name}_moe"] = None
+                continue
+            numerator, _ = _expand((*sizes(r), r[f"{name}__s"], 0.0) for r in present)
+            denominator, _ = _expand((*sizes(r), r[f"{name}__m"], 0.0) for r in present)
+            ratio = numerator / denominator
+            # Linearized variance: sums of (x - ratio) rebuilt from the sums of x and x^2
+            _, variance = _expand((
+                *sizes(r),
+                r[f"{name}__s"] - ratio * r[f"{name}__m"],
+                r[f"{name}__ss"] - 2 * ratio * r[f"{name}__s"] + ratio * ratio * r[f"{name}__m"]
+            ) for r in present)
+            result[name] = ratio
+            result[f"{name}_moe"] = _margin(variance) / denominator if with_margin else None
+
+        elif aggregate in ("max", "min"):
+            values = [r[f"{name}__x"] for r in strata_rows if r[f"{name}__x"] is not None]
+            result[name] = (max if aggregate == "max" else min)(values, default=None)
+
+        else:
+            # Distinct counts do not scale from a sample (see module docstring)
+            result[name] = None
+
+    result["sample_rows"] = sample_rows
+    return result
+
+
+def estimate_summary(aggregate_rows, table_name):
+    """
+    Finish the approx_<table> rows from per (group, stratum) aggregates
+    """
+    spec = SUMMARIES[table_name]
+    groups = defaultdict(list)
+    for row in aggregate_rows:
+        groups[tuple(row[key] for key in spec["keys"])].append(row)
+
+    output = []
+    for key, strata_rows in groups.items():
+        row = dict(zip(spec["keys"], key))
+        row.update(_estimate_group(strata_rows, spec["metrics"]))
+        for name, numerator, denominator in spec["ratios"]:
+            parts = row[numerator], row[denominator]
+            row[name] = parts[0] / parts[1] if None not in parts and parts[1] else None
+        output.append(row)
+
+    if "rank" in spec:
+        rank_name, rank_field = spec["rank"]
+        distinct_values = sorted({r[rank_field] for r in output}, reverse=True)
+        ranks = {value: i + 1 for i, value in enumerate(distinct_values)}
+        for row in output:
+            row[rank_name] = ranks[row[rank_field]]
+
+    # Stable sorts from the last order column to the first
+    for column, descending in reversed(spec["order_by"]):
+        output.sort(key=lambda r: r[column], reverse=descending)
+    return output
+
+
+def unestimated_columns(table_name):
+    """
+    Columns of approx_<table> that are always NULL: distinct counts and the
+    ratios built on them
+    """
+    spec = SUMMARIES[table_name]
+    columns = {name for name, aggregate, _ in spec["metrics"] if aggregate == "distinct"}
+    columns |= {name for name, numerator, denominator in spec["ratios"]
+                if {numerator, denominator} & columns}
+    return columns
+
+
+def approx_summaries(sample_rows, tables=None):
+    """
+    Estimate the summary tables from in-memory stratified sample rows.
+
+    Returns {table_name: [row, ...]}; estimated counts, sums and averages
+    come with a <metric>_moe column holding the 95% margin of error.
+    """
+    return {
+        name: estimate_summary(stratum_aggregates(sample_rows, name), name)
+        for name in (tables or SUMMARIES)
+    }
@@ -1,4 +1,6 @@
 import sys
+import json
+import boto3
 from awsglue.transforms import *
 from awsglue.utils import getResolvedOptions
 from pyspark.context import SparkContext
@@ -6,8 +8,12 @@ from awsglue.context import GlueContext
 from awsglue.job import Job
 from pyspark.sql.functions import *
 from pyspark.sql.types import *
-from awsglue.dynamicframe import DynamicFrame
 from datetime import datetime, timedelta
+from table_layout import select_expressions, register_tables, PROCESSED_ORDERS_PREFIX
+from approx_analytics import (
+    build_stratified_sample, build_stratum_aggregates, estimate_summary, MAX_SAMPLE_FRACTION
+)
+from summary_tables import build_summaries, SUMMARY_TABLES
 
 # Get job parameters
 args = getResolvedOptions(sys.argv, [
@@ -33,9 +39,27 @@ job.init(args['JOB_NAME'], args)
 database_name = args['DATABASE_NAME']
 s3_bucket = args['S3_BUCKET']
 raw_data_path = f"s3://{s3_bucket}/raw-data/orders/"
-processed_data_path = f"s3://{s3_bucket}/processed-data/"
+# Own prefix: processed-data/orders/ holds the stream processor's JSON lines
+processed_data_path = f"s3://{s3_bucket}/{PROCESSED_ORDERS_PREFIX}"
 analytics_results_path = f"s3://{s3_bucket}/analytics-results/"
 
+# Optional: fraction of each stratum kept in the approximate-analytics sample (0 disables)
+approx_sample_fraction = 0.0
+if '--APPROX_SAMPLE_FRACTION' in sys.argv:
+    approx_sample_fraction = float(getResolvedOptions(
+        sys.argv, ['APPROX_SAMPLE_FRACTION'])['APPROX_SAMPLE_FRACTION'])
+if approx_sample_fraction > MAX_SAMPLE_FRACTION:
+    print(f"APPROX_SAMPLE_FRACTION {approx_sample_fraction} capped at {MAX_SAMPLE_FRACTION}")
+    approx_sample_fraction = MAX_SAMPLE_FRACTION
+
+# Optional: skip the exact summaries and only refresh the approx_<table> estimates
+approx_only = False
+if '--APPROX_ONLY' in sys.argv:
+    approx_only = getResolvedOptions(sys.argv, ['APPROX_ONLY'])['APPROX_ONLY'].lower() == 'true'
+if approx_only and approx_sample_fraction <= 0:
+    print("APPROX_ONLY needs APPROX_SAMPLE_FRACTION > 0, computing the exact summaries")
+    approx_only = False
+
 print(f"Starting ETL job: {args['JOB_NAME']}")
 print(f"Database: {database_name}")
 print(f"S3 Bucket: {s3_bucket}")
@@ -164,69 +188,15 @@ try:
         .withColumn("discount_amount", col("discount_amount").cast(DoubleType())) \
         .withColumn("customer_age", col("customer_age").cast(IntegerType()))
 
-    # Select final columns in order
-    final_columns = [
-        # Order Information
-        "order_id",
-        "order_timestamp",
-        "order_year",
-        "order_month",
-        "order_day",
-        "order_hour",
-        "order_weekday",
-        "order_week",
-        "order_quarter",
-        "is_weekend",
-        "day_part",
-
-        # Customer Information
-        "customer_id",
-        "customer_age",
-        "customer_location",
-        "customer_segment",
-        "is_returning_customer",
-        "is_prime_member",
-
-        # Product Information
-        "product_name",
-        "category",
-        "quantity",
-        "price",
-        "revenue_per_item",
-
-        # Financial Information
-        "subtotal",
-        "discount_percentage",
-        "discount_amount",
-        "total_amount",
-        "is_discounted",
-        "order_size_category",
-        "is_high_value",
-
-        # Transaction Details
-        "payment_method",
-        "shipping_method",
-        "device_type",
-        "referral_source",
-        "promo_code_used",
-        "estimated_delivery_days",
-
-        # Session Information
-        "session_duration_seconds",
-        "items_viewed",
-
-        # Processing Metadata
-        "processing_timestamp",
-        "etl_batch_id"
-    ]
-
-    # Select only columns that exist
-    existing_columns = [
-        col for col in final_columns if col in df_typed.columns]
-    df_final = df_typed.select(existing_columns)
+    # Select final columns in order, cast to the catalog schema in table_layout.py
+    # Cached: the write, the summaries, the sample and the job metrics all
+    # read it
+    df_final = df_typed.selectExpr(
+        *select_expressions("processed_orders", df_typed.columns)).cache()
+    final_count = df_final.count()
 
     print(
-        f"Final dataset: {df_final.count()} records, {len(df_final.columns)} columns")
+        f"Final dataset: {final_count} records, {len(df_final.columns)} columns")
 
     # ============================================
     # LOAD: Write processed data
@@ -245,119 +215,80 @@ try:
     # ANALYTICS: Generate aggregated tables
     # ============================================
 
-    print("Generating analytics summaries...")
-
-    # 1. Daily Revenue Summary
-    daily_summary = df_final.groupBy(
-        "order_year", "order_month", "order_day", "order_weekday", "is_weekend"
-    ).agg(
-        count("order_id").alias("total_orders"),
-        countDistinct("customer_id").alias("unique_customers"),
-        sum("total_amount").alias("total_revenue"),
-        avg("total_amount").alias("avg_order_value"),
-        max("total_amount").alias("max_order_value"),
-        min("total_amount").alias("min_order_value"),
-        sum("quantity").alias("total_items_sold"),
-        avg("discount_percentage").alias("avg_discount_rate"),
-        sum(when(col("is_discounted"), 1).otherwise(
-            0)).alias("discounted_orders"),
-        sum(when(col("is_high_value"), 1).otherwise(
-            0)).alias("high_value_orders"),
-        sum(when(col("is_prime_member"), 1).otherwise(0)).alias("prime_orders")
-    ).withColumn("conversion_rate",
-                 col("total_orders") / col("unique_customers")
-                 ).orderBy("order_year", "order_month", "order_day")
-
-    daily_summary.coalesce(1).write \
-        .mode("overwrite") \
-        .option("header", "true") \
-        .parquet(f"{analytics_results_path}daily_summary/")
-
-    # 2. Product Performance
-    product_performance = df_final.groupBy("product_name", "category").agg(
-        count("order_id").alias("order_count"),
-        sum("quantity").alias("total_quantity"),
-        sum("total_amount").alias("total_revenue"),
-        avg("total_amount").alias("avg_order_value"),
-        avg("discount_percentage").alias("avg_discount"),
-        countDistinct("customer_id").alias("unique_buyers"),
-        avg("revenue_per_item").alias("avg_item_price")
-    ).withColumn("revenue_rank",
-                 dense_rank().over(Window.orderBy(desc("total_revenue")))
-                 ).orderBy(desc("total_revenue"))
-
-    product_performance.coalesce(1).write \
-        .mode("overwrite") \
-        .option("header", "true") \
-        .parquet(f"{analytics_results_path}product_performance/")
-
-    # 3. Customer Segment Analysis
-    customer_segments = df_final.groupBy(
-        "customer_segment", "customer_location", "is_prime_member"
-    ).agg(
-        countDistinct("customer_id").alias("unique_customers"),
-        count("order_id").alias("total_orders"),
-        sum("total_amount").alias("total_revenue"),
-        avg("total_amount").alias("avg_order_value"),
-        avg("customer_age").alias("avg_age"),
-        sum("quantity").alias("total_items"),
-        avg("items_viewed").alias("avg_items_viewed"),
-        avg("session_duration_seconds").alias("avg_session_duration")
-    ).withColumn("orders_per_customer",
-                 col("total_orders") / col("unique_customers")
-                 ).orderBy(desc("total_revenue"))
-
-    customer_segments.coalesce(1).write \
-        .mode("overwrite") \
-        .option("header", "true") \
-        .parquet(f"{analytics_results_path}customer_segments/")
-
-    # 4. Payment & Device Analysis
-    payment_device = df_final.groupBy("payment_method", "device_type").agg(
-        count("order_id").alias("transaction_count"),
-        sum("total_amount").alias("total_revenue"),
-        avg("total_amount").alias("avg_transaction_value"),
-        countDistinct("customer_id").alias("unique_users")
-    ).orderBy(desc("transaction_count"))
-
-    payment_device.coalesce(1).write \
-        .mode("overwrite") \
-        .option("header", "true") \
-        .parquet(f"{analytics_results_path}payment_device_analysis/")
-
-    # 5. Hourly Patterns
-    hourly_patterns = df_final.groupBy("order_hour", "day_part").agg(
-        count("order_id").alias("order_count"),
-        sum("total_amount").alias("total_revenue"),
-        avg("total_amount").alias("avg_order_value"),
-        countDistinct("customer_id").alias("unique_customers")
-    ).orderBy("order_hour")
-
-    hourly_patterns.coalesce(1).write \
-        .mode("overwrite") \
-        .option("header", "true") \
-        .parquet(f"{analytics_results_path}hourly_patterns/")
-
-    print("Analytics summaries generated successfully")
+    # JSON copies of the small summary tables go to analytics-results/api/
+    # for the query API Lambda
+    api_tables = []
+
+    if not approx_only:
+        print("Generating analytics summaries...")
+
+        summaries = build_summaries(df_final)
+        for table_name in SUMMARY_TABLES:
+            summaries[table_name].selectExpr(
+                *select_expressions(table_name, summaries[table_name].columns)) \
+                .coalesce(1).write \
+                .mode("overwrite") \
+                .option("header", "true") \
+                .parquet(f"{analytics_results_path}{table_name}/")
+            api_tables.append(table_name)
+
+        print("Analytics summaries generated successfully")
+
+    # ============================================
+    # APPROXIMATE ANALYTICS: Stratified sample
+    # ============================================
+
+    # Sample by order date x category x customer segment so dashboard
+    # previews can read a few percent of the data, and estimate the summary
+    # tables from it with margins of error (see approx_analytics.py)
+    if approx_sample_fraction > 0:
+        orders_sample = build_stratified_sample(df_final, approx_sample_fraction)
+        orders_sample = orders_sample.selectExpr(
+            *select_expressions("orders_sample", orders_sample.columns)).cache()
+        orders_sample.coalesce(1).write \
+            .mode("overwrite") \
+            .parquet(f"{analytics_results_path}orders_sample/")
+
+        print(f"Wrote stratified sample ({approx_sample_fraction:.0%} per stratum) "
+              f"to {analytics_results_path}orders_sample/")
+
+        # Spark reduces the sample to one row of counts, sums and sums of
+        # squares per (group, stratum); only those reach the driver
+        aggregate_rows = 0
+        for table_name in SUMMARY_TABLES:
+            aggregates = [row.asDict() for row in
+                          build_stratum_aggregates(orders_sample, table_name).collect()]
+            aggregate_rows += len(aggregates)
+            rows = estimate_summary(aggregates, table_name)
+            approx_name = f"approx_{table_name}"
+            estimates = spark.read.json(sc.parallelize(
+                [json.dumps(row, default=str) for row in rows], 1))
+            estimates.selectExpr(*select_expressions(approx_name, estimates.columns)) \
+                .coalesce(1).write \
+                .mode("overwrite") \
+                .parquet(f"{analytics_results_path}{approx_name}/")
+            api_tables.append(approx_name)
+
+        print(f"Estimated {len(SUMMARY_TABLES)} approximate summaries "
+              f"from {aggregate_rows} stratum aggregates")
+
+    # Read back from the parquet output so the aggregations are not recomputed
+    for table_name in api_tables:
+        spark.read.parquet(f"{analytics_results_path}{table_name}/") \
+            .coalesce(1).write \
+            .mode("overwrite") \
+            .json(f"{analytics_results_path}api/{table_name}/")
 
     # ============================================
     # DATA CATALOG: Update Glue Catalog
     # ============================================
 
-    # Convert to DynamicFrame for Glue Catalog
-    dynamic_frame = DynamicFrame.fromDF(
-        df_final, glueContext, "processed_orders")
-
-    # Write to Glue Catalog (this creates/updates the table in the catalog)
-    sink = glueContext.write_dynamic_frame.from_catalog(
-        frame=dynamic_frame,
-        database=database_name,
-        table_name="processed_orders",
-        additional_options={
-            "enableUpdateCatalog": True,
-            "updateBehavior": "UPDATE_IN_DATABASE"
-        }
-    )
+    # Explicit schemas with partition projection: new partitions are
+    # queryable as soon as they are written, without a crawler run. The
+    # order_year projection range is widened to the years written here.
+    order_years = [row["order_year"] for row in
+                   df_final.select("order_year").distinct().collect()]
+    register_tables(boto3.client("glue"), database_name, s3_bucket, order_years)
 
     print("Glue catalog updated successfully")
 
@@ -365,17 +296,26 @@ try:
     # JOB METRICS: Log performance metrics
     # ============================================
 
+    # One pass over the cached orders; approx_only runs use HyperLogLog
+    # for the customer count instead of an exact distinct shuffle
+    customer_count = approx_count_distinct("customer_id") if approx_only \
+        else countDistinct("customer_id")
+    totals = df_final.agg(
+        customer_count.alias("unique_customers"),
+        countDistinct("product_name").alias("unique_products"),
+        sum("total_amount").alias("total_revenue")).collect()[0]
+
     job_metrics = {
         "job_name": args['JOB_NAME'],
         "start_time": job.get_start_time(),
         "raw_records": initial_count,
-        "processed_records": df_final.count(),
+        "processed_records": final_count,
         "corrupt_records": corrupt_count,
         "duplicate_records": duplicate_count,
         "filtered_records": filtered_count,
-        "unique_customers": df_final.select("customer_id").distinct().count(),
-        "unique_products": df_final.select("product_name").distinct().count(),
-        "total_revenue": df_final.agg(sum("total_amount")).collect()[0][0],
+        "unique_customers": totals["unique_customers"],
+        "unique_products": totals["unique_products"],
+        "total_revenue": totals["total_revenue"],
         "processing_date": datetime.now().isoformat()
     }
 
@@ -387,6 +327,8 @@ try:
         .mode("append") \
         .json(f"s3://{s3_bucket}/job-metrics/")
 
+    df_final.unpersist()
+
 except Exception as e:
     print(f"Error in ETL job: {str(e)}")
     import traceback
@@ -0,0 +1,281 @@
+"""
+Analytics summary tables built by the ETL job from processed_orders.
+
+SUMMARIES describes every table once; build_summaries() turns it into the
+Spark aggregations. summarize_rows() is a plain-Python equivalent over dict
+rows, written out by hand (independently of the spec and of the approximate
+estimators in approx_analytics.py) for local checks and the approximate
+analytics benchmark.
+"""
+from collections import defaultdict
+
+
+# The summary tables, in output order (analytics-results/<table>/): group
+# keys, metrics as (output column, aggregate, source field), ratios of two
+# metrics, an optional dense rank and the row order. build_summaries(), the
+# approx_<table> estimates (approx_analytics.py) and the catalog columns
+# (table_layout.py) are all derived from this spec.
+SUMMARIES = {
+    # 1. Daily Revenue Summary
+    "daily_summary": {
+        "keys": ["order_year", "order_month", "order_day", "order_weekday", "is_weekend"],
+        "metrics": [
+            ("total_orders", "count", "order_id"),
+            ("unique_customers", "distinct", "customer_id"),
+            ("total_revenue", "sum", "total_amount"),
+            ("avg_order_value", "avg", "total_amount"),
+            ("max_order_value", "max", "total_amount"),
+            ("min_order_value", "min", "total_amount"),
+            ("total_items_sold", "sum", "quantity"),
+            ("avg_discount_rate", "avg", "discount_percentage"),
+            ("discounted_orders", "sum", "is_discounted"),
+            ("high_value_orders", "sum", "is_high_value"),
+            ("prime_orders", "sum", "is_prime_member"),
+        ],
+        "ratios": [("conversion_rate", "total_orders", "unique_customers")],
+        "order_by": [("order_year", False), ("order_month", False), ("order_day", False)],
+    },
+    # 1b. Daily Revenue by Category (e.g. "today's revenue by category" in the query API)
+    "daily_category_summary": {
+        "keys": ["order_year", "order_month", "order_day", "category"],
+        "metrics": [
+            ("total_orders", "count", "order_id"),
+            ("unique_customers", "distinct", "customer_id"),
+            ("total_revenue", "sum", "total_amount"),
+            ("avg_order_value", "avg", "total_amount"),
+            ("total_items_sold", "sum", "quantity"),
+            ("discounted_orders", "sum", "is_discounted"),
+        ],
+        "ratios": [],
+        "order_by": [("order_year", False), ("order_month", False), ("order_day", False),
+                     ("total_revenue", True)],
+    },
+    # 2. Product Performance
+    "product_performance": {
+        "keys": ["product_name", "category"],
+        "metrics": [
+            ("order_count", "count", "order_id"),
+            ("total_quantity", "sum", "quantity"),
+            ("total_revenue", "sum", "total_amount"),
+            ("avg_order_value", "avg", "total_amount"),
+            ("avg_discount", "avg", "discount_percentage"),
+            ("unique_buyers", "distinct", "customer_id"),
+            ("avg_item_price", "avg", "revenue_per_item"),
+        ],
+        "ratios": [],
+        "rank": ("revenue_rank", "total_revenue"),
+        "order_by": [("total_revenue", True)],
+    },
+    # 3. Customer Segment Analysis
+    "customer_segments": {
+        "keys": ["customer_segment", "customer_location", "is_prime_member"],
+        "metrics": [
+            ("unique_customers", "distinct", "customer_id"),
+            ("total_orders", "count", "order_id"),
+            ("total_revenue", "sum", "total_amount"),
+            ("avg_order_value", "avg", "total_amount"),
+            ("avg_age", "avg", "customer_age"),
+            ("total_items", "sum", "quantity"),
+            ("avg_items_viewed", "avg", "items_viewed"),
+            ("avg_session_duration", "avg", "session_duration_seconds"),
+        ],
+        "ratios": [("orders_per_customer", "total_orders", "unique_customers")],
+        "order_by": [("total_revenue", True)],
+    },
+    # 4. Payment & Device Analysis
+    "payment_device_analysis": {
+        "keys": ["payment_method", "device_type"],
+        "metrics": [
+            ("transaction_count", "count", "order_id"),
+            ("total_revenue", "sum", "total_amount"),
+            ("avg_transaction_value", "avg", "total_amount"),
+            ("unique_users", "distinct", "customer_id"),
+        ],
+        "ratios": [],
+        "order_by": [("transaction_count", True)],
+    },
+    # 5. Hourly Patterns
+    "hourly_patterns": {
+        "keys": ["order_hour", "day_part"],
+        "metrics": [
+            ("order_count", "count", "order_id"),
+            ("total_revenue", "sum", "total_amount"),
+            ("avg_order_value", "avg", "total_amount"),
+            ("unique_customers", "distinct", "customer_id"),
+        ],
+        "ratios": [],
+        "order_by": [("order_hour", False)],
+    },
+}
+
+SUMMARY_TABLES = list(SUMMARIES)
+
+
+def build_summaries(df):
+    """
+    Spark DataFrames of the summary tables, keyed by table name
+    """
+    from pyspark.sql import Window
+    from pyspark.sql import functions as F
+
+    types = dict(df.dtypes)
+
+    def aggregate(aggregate_name, field):
+        if aggregate_name == "count":
+            return F.count(field)
+        if aggregate_name == "distinct":
+            return F.countDistinct(field)
+        if aggregate_name == "sum" and types.get(field) == "boolean":
+            # Flags are summed as the number of true rows
+            return F.sum(F.when(F.col(field), 1).otherwise(0))
+        return getattr(F, aggregate_name)(field)
+
+    summaries = {}
+    for table_name, spec in SUMMARIES.items():
+        summary = df.groupBy(*spec["keys"]).agg(*[
+            aggregate(aggregate_name, field).alias(name)
+            for name, aggregate_name, field in spec["metrics"]
+        ])
+        for name, numerator, denominator in spec["ratios"]:
+            summary = summary.withColumn(name, F.col(numerator) / F.col(denominator))
+        if "rank" in spec:
+            rank_name, rank_field = spec["rank"]
+            summary = summary.withColumn(
+                rank_name, F.dense_rank().over(Window.orderBy(F.desc(rank_field))))
+        summaries[table_name] = summary.orderBy(*[
+            F.desc(column) if descending else F.col(column)
+            for column, descending in spec["order_by"]
+        ])
+    return summaries
+
+
+def _present(rows, field):
+    return [row[field] for row in rows if row.get(field) is not None]
+
+
+def _sum(rows, field):
+    values = _present(rows, field)
+    return sum(values) if values else None
+
+
+def _avg(rows, field):
+    values = _present(rows, field)
+    return sum(values) / len(values) if values else None
+
+
+def _distinct(rows, field):
+    return len(set(_present(rows, field)))
+
+
+def _flags(rows, field):
+    return sum(1 for row in rows if row.get(field))
+
+
+def _group(rows, keys):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[tuple(row.get(key) for key in keys)].append(row)
+    return groups
+
+
+def summarize_rows(rows):
+    """
+    The summary tables over dict rows, as {table_name: [row, ...]} (rows unordered)
+    """
+    summaries = {}
+
+    daily = []
+    for key, group in _group(rows, ["order_year", "order_month", "order_day",
+                                    "order_weekday", "is_weekend"]).items():
+        out = dict(zip(["order_year", "order_month", "order_day",
+                        "order_weekday", "is_weekend"], key))
+        out.update({
+            "total_orders": len(_present(group, "order_id")),
+            "unique_customers": _distinct(group, "customer_id"),
+            "total_revenue": _sum(group, "total_amount"),
+            "avg_order_value": _avg(group, "total_amount"),
+            "max_order_value": max(_present(group, "total_amount"), default=None),
+            "min_order_value": min(_present(group, "total_amount"), default=None),
+            "total_items_sold": _sum(group, "quantity"),
+            "avg_discount_rate": _avg(group, "discount_percentage"),
+            "discounted_orders": _flags(group, "is_discounted"),
+            "high_value_orders": _flags(group, "is_high_value"),
+            "prime_orders": _flags(group, "is_prime_member"),
+        })
+        out["conversion_rate"] = out["total_orders"] / out["unique_customers"] \
+            if out["unique_customers"] else None
+        daily.append(out)
+    summaries["daily_summary"] = daily
+
+    daily_category = []
+    for key, group in _group(rows, ["order_year", "order_month", "order_day",
+                                    "category"]).items():
+        out = dict(zip(["order_year", "order_month", "order_day", "category"], key))
+        out.update({
+            "total_orders": len(_present(group, "order_id")),
+            "unique_customers": _distinct(group, "customer_id"),
+            "total_revenue": _sum(group, "total_amount"),
+            "avg_order_value": _avg(group, "total_amount"),
+            "total_items_sold": _sum(group, "quantity"),
+            "discounted_orders": _flags(group, "is_discounted"),
+        })
+        daily_category.append(out)
+    summaries["daily_category_summary"] = daily_category
+
+    products = []
+    for (product_name, category), group in _group(rows, ["product_name", "category"]).items():
+        products.append({
+            "product_name": product_name,
+            "category": category,
+            "order_count": len(_present(group, "order_id")),
+            "total_quantity": _sum(group, "quantity"),
+            "total_revenue": _sum(group, "total_amount"),
+            "avg_order_value": _avg(group, "total_amount"),
+            "avg_discount": _avg(group, "discount_percentage"),
+            "unique_buyers": _distinct(group, "customer_id"),
+            "avg_item_price": _avg(group, "revenue_per_item"),
+        })
+    revenues = sorted({p["total_revenue"] for p in products}, reverse=True)
+    for product in products:
+        product["revenue_rank"] = revenues.index(product["total_revenue"]) + 1
+    summaries["product_performance"] = products
+
+    segments = []
+    for key, group in _group(rows, ["customer_segment", "customer_location",
+                                    "is_prime_member"]).items():
+        out = dict(zip(["customer_segment", "customer_location", "is_prime_member"], key))
+        out.update({
+            "unique_customers": _distinct(group, "customer_id"),
+            "total_orders": len(_present(group, "order_id")),
+            "total_revenue": _sum(group, "total_amount"),
+            "avg_order_value": _avg(group, "total_amount"),
+            "avg_age": _avg(group, "customer_age"),
+            "total_items": _sum(group, "quantity"),
+            "avg_items_viewed": _avg(group, "items_viewed"),
+            "avg_session_duration": _avg(group, "session_duration_seconds"),
+        })
+        out["orders_per_customer"] = out["total_orders"] / out["unique_customers"] \
+            if out["unique_customers"] else None
+        segments.append(out)
+    summaries["customer_segments"] = segments
+
+    summaries["payment_device_analysis"] = [
+        {"payment_method": payment_method, "device_type": device_type,
+         "transaction_count": len(_present(group, "order_id")),
+         "total_revenue": _sum(group, "total_amount"),
+         "avg_transaction_value": _avg(group, "total_amount"),
+         "unique_users": _distinct(group, "customer_id")}
+        for (payment_method, device_type), group
+        in _group(rows, ["payment_method", "device_type"]).items()
+    ]
+
+    summaries["hourly_patterns"] = [
+        {"order_hour": order_hour, "day_part": day_part,
+         "order_count": len(_present(group, "order_id")),
+         "total_revenue": _sum(group, "total_amount"),
+         "avg_order_value": _avg(group, "total_amount"),
+         "unique_customers": _distinct(group, "customer_id")}
+        for (order_hour, day_part), group in _group(rows, ["order_hour", "day_part"]).items()
+    ]
+
+    return summaries
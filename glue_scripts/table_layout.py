@@ -0,0 +1,397 @@
+"""
+Explicit Glue/Athena table layout for the data lake.
+
+The ETL job selects and casts its output to these schemas, then registers the
+tables in the Glue catalog with Athena partition projection, so new
+partitions are queryable as soon as they are written and no crawler has to
+walk the bucket. raw_orders covers the stream processor's JSON lines copy of
+the raw orders, so it is queryable before the ETL job has run.
+
+Print the Athena DDL, or register the tables without waiting for an ETL run:
+    python glue_scripts/table_layout.py --bucket <data-lake-bucket> --database <glue-db>
+    python glue_scripts/table_layout.py --bucket <data-lake-bucket> --database <glue-db> --register
+"""
+import argparse
+from datetime import date
+
+from approx_analytics import MOE_AGGREGATES
+from summary_tables import SUMMARIES, SUMMARY_TABLES
+
+
+# Stream processor output: raw-data/orders/ holds JSON arrays (one per batch),
+# which Athena cannot split into rows, so raw_orders reads the JSON lines copy
+RAW_ORDERS_PREFIX = "processed-data/orders/"
+PROCESSED_ORDERS_PREFIX = "processed-data/processed_orders/"
+ANALYTICS_RESULTS_PREFIX = "analytics-results/"
+
+# Orders as the stream processor writes them (data_generator fields plus
+# derived ones); timestamps stay ISO strings, parse them with from_iso8601_timestamp
+RAW_ORDERS_COLUMNS = [
+    ("order_id", "string"),
+    ("customer_id", "string"),
+    ("product_name", "string"),
+    ("category", "string"),
+    ("quantity", "int"),
+    ("price", "double"),
+    ("subtotal", "double"),
+    ("discount_percentage", "int"),
+    ("discount_amount", "double"),
+    ("total_amount", "double"),
+    ("order_date", "string"),
+    ("customer_age", "int"),
+    ("customer_location", "string"),
+    ("customer_segment", "string"),
+    ("payment_method", "string"),
+    ("shipping_method", "string"),
+    ("is_prime_member", "boolean"),
+    ("device_type", "string"),
+    ("session_duration_seconds", "int"),
+    ("items_viewed", "int"),
+    ("is_returning_customer", "boolean"),
+    ("referral_source", "string"),
+    ("promo_code_used", "string"),
+    ("estimated_delivery_days", "int"),
+    ("order_year", "int"),
+    ("order_month", "int"),
+    ("order_day", "int"),
+    ("order_hour", "int"),
+    ("order_weekday", "int"),
+    ("is_weekend", "boolean"),
+    ("is_high_value", "boolean"),
+    ("order_size", "string"),
+    ("processed_timestamp", "string"),
+    ("kinesis_sequence_number", "string"),
+    ("kinesis_partition_key", "string"),
+]
+
+# Batch date directory (YYYY/MM/DD) written by the stream processor
+RAW_ORDERS_PARTITION_KEYS = ["dt"]
+
+# Final processed-orders columns in output order (Athena/Hive type names,
+# which Spark also accepts in CAST expressions)
+PROCESSED_ORDERS_COLUMNS = [
+    # Order Information
+    ("order_id", "string"),
+    ("order_timestamp", "timestamp"),
+    ("order_year", "int"),
+    ("order_month", "int"),
+    ("order_day", "int"),
+    ("order_hour", "int"),
+    ("order_weekday", "int"),
+    ("order_week", "int"),
+    ("order_quarter", "int"),
+    ("is_weekend", "boolean"),
+    ("day_part", "string"),
+
+    # Customer Information
+    ("customer_id", "string"),
+    ("customer_age", "int"),
+    ("customer_location", "string"),
+    ("customer_segment", "string"),
+    ("is_returning_customer", "boolean"),
+    ("is_prime_member", "boolean"),
+
+    # Product Information
+    ("product_name", "string"),
+    ("category", "string"),
+    ("quantity", "int"),
+    ("price", "double"),
+    ("revenue_per_item", "double"),
+
+    # Financial Information
+    ("subtotal", "double"),
+    ("discount_percentage", "bigint"),
+    ("discount_amount", "double"),
+    ("total_amount", "double"),
+    ("is_discounted", "boolean"),
+    ("order_size_category", "string"),
+    ("is_high_value", "boolean"),
+
+    # Transaction Details
+    ("payment_method", "string"),
+    ("shipping_method", "string"),
+    ("device_type", "string"),
+    ("referral_source", "string"),
+    ("promo_code_used", "string"),
+    ("estimated_delivery_days", "bigint"),
+
+    # Session Information
+    ("session_duration_seconds", "bigint"),
+    ("items_viewed", "bigint"),
+
+    # Processing Metadata
+    ("processing_timestamp", "timestamp"),
+    ("etl_batch_id", "string"),
+]
+
+# Hive-style partition directories written by partitionBy() in the ETL job
+PROCESSED_ORDERS_PARTITION_KEYS = ["order_year", "order_month", "order_day"]
+
+# Partition projection (Spark writes unpadded values, e.g. order_month=3).
+# The order_year range is derived from the data on every ETL run, see
+# order_year_range(); the stream's dt dates are projected up to today.
+PARTITION_PROJECTION = {
+    "order_month": {"type": "integer", "range": "1,12"},
+    "order_day": {"type": "integer", "range": "1,31"},
+    "dt": {"type": "date", "range": "NOW-3YEARS,NOW", "format": "yyyy/MM/dd",
+           "interval": "1", "interval.unit": "DAYS"},
+}
+
+
+def _summary_columns(table_name):
+    """
+    Columns of a summary table, typed like Spark's aggregates over
+    processed_orders: group keys, metrics, ratios, then the rank
+    """
+    spec = SUMMARIES[table_name]
+    source_types = dict(PROCESSED_ORDERS_COLUMNS)
+    columns = [(key, source_types[key]) for key in spec["keys"]]
+    for name, aggregate, field in spec["metrics"]:
+        if aggregate in ("count", "distinct"):
+            data_type = "bigint"
+        elif aggregate == "sum":
+            # Integer and flag sums stay integral
+            data_type = "double" if source_types[field] == "double" else "bigint"
+        elif aggregate == "avg":
+            data_type = "double"
+        else:
+            data_type = source_types[field]
+        columns.append((name, data_type))
+    columns += [(name, "double") for name, _, _ in spec["ratios"]]
+    if "rank" in spec:
+        columns.append((spec["rank"][0], "int"))
+    return columns
+
+
+# Summary tables written by the ETL job (summary_tables.py)
+ANALYTICS_TABLE_COLUMNS = {name: _summary_columns(name) for name in SUMMARY_TABLES}
+
+# Stratified sample of processed_orders for approximate analytics (approx_analytics.py)
+ANALYTICS_TABLE_COLUMNS["orders_sample"] = PROCESSED_ORDERS_COLUMNS + [
+    ("stratum_id", "string"),
+    ("stratum_population", "bigint"),
+    ("stratum_sample_size", "bigint"),
+    ("sample_weight", "double"),
+]
+
+
+def _approx_columns(table_name):
+    """
+    Columns of approx_<table>: the summary's columns, estimated sums as
+    double, a 95% margin of error after each estimated metric and the
+    number of sample rows behind each group
+    """
+    aggregates = {name: aggregate for name, aggregate, _ in SUMMARIES[table_name]["metrics"]}
+    columns = []
+    for name, data_type in ANALYTICS_TABLE_COLUMNS[table_name]:
+        if aggregates.get(name) == "sum":
+            data_type = "double"
+        columns.append((name, data_type))
+        if aggregates.get(name) in MOE_AGGREGATES:
+            columns.append((f"{name}_moe", "double"))
+    return columns + [("sample_rows", "bigint")]
+
+
+# Summary tables estimated from orders_sample by the ETL job (approx_analytics.py)
+ANALYTICS_TABLE_COLUMNS.update({
+    f"approx_{name}": _approx_columns(name) for name in SUMMARY_TABLES
+})
+
+PARQUET_INPUT_FORMAT = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+PARQUET_OUTPUT_FORMAT = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+PARQUET_SERDE = "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+JSON_INPUT_FORMAT = "org.apache.hadoop.mapred.TextInputFormat"
+JSON_OUTPUT_FORMAT = "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat"
+JSON_SERDE = "org.openx.data.jsonserde.JsonSerDe"
+
+
+def table_names():
+    return ["raw_orders", "processed_orders"] + list(ANALYTICS_TABLE_COLUMNS)
+
+
+def table_columns(table_name):
+    """
+    All output columns of a table in write order, partition keys included
+    """
+    if table_name == "raw_orders":
+        return RAW_ORDERS_COLUMNS + [("dt", "string")]
+    if table_name == "processed_orders":
+        return PROCESSED_ORDERS_COLUMNS
+    return ANALYTICS_TABLE_COLUMNS[table_name]
+
+
+def partition_keys(table_name):
+    if table_name == "raw_orders":
+        return RAW_ORDERS_PARTITION_KEYS
+    return PROCESSED_ORDERS_PARTITION_KEYS if table_name == "processed_orders" else []
+
+
+def table_location(table_name, bucket):
+    if table_name == "raw_orders":
+        return f"s3://{bucket}/{RAW_ORDERS_PREFIX}"
+    if table_name == "processed_orders":
+        return f"s3://{bucket}/{PROCESSED_ORDERS_PREFIX}"
+    return f"s3://{bucket}/{ANALYTICS_RESULTS_PREFIX}{table_name}/"
+
+
+def order_year_range(years, existing_range=None):
+    """
+    order_year projection range covering the given years and an existing
+    "low,high" range, so partitions written by earlier runs stay visible.
+    Falls back to the current year when there is nothing to cover.
+    """
+    bounds = [int(y) for y in years if y is not None]
+    if existing_range:
+        bounds.extend(int(y) for y in existing_range.split(","))
+    if not bounds:
+        bounds = [date.today().year]
+    return f"{min(bounds)},{max(bounds)}"
+
+
+def select_expressions(table_name, available_columns):
+    """
+    Spark SQL expressions that select a table's columns in order and cast
+    them to the catalog types. Columns missing from the input (e.g. a field
+    absent from every raw record in the batch) become typed NULLs so the
+    written parquet schema never drifts from the catalog.
+    """
+    available = set(available_columns)
+    return [
+        f"CAST(`{name}` AS {data_type}) AS `{name}`" if name in available
+        else f"CAST(NULL AS {data_type}) AS `{name}`"
+        for name, data_type in table_columns(table_name)
+    ]
+
+
+def table_parameters(table_name, bucket, year_range=None):
+    parameters = {
+        "classification": "json" if table_name == "raw_orders" else "parquet",
+        "EXTERNAL": "TRUE",
+    }
+    if table_name != "raw_orders":
+        parameters["parquet.compression"] = "SNAPPY"
+    keys = partition_keys(table_name)
+    if keys:
+        parameters["projection.enabled"] = "true"
+        for key in keys:
+            projection = PARTITION_PROJECTION.get(key) or \
+                {"type": "integer", "range": year_range or order_year_range([])}
+            for name, value in projection.items():
+                parameters[f"projection.{key}.{name}"] = value
+        if table_name == "raw_orders":
+            template = "${dt}"
+        else:
+            template = "/".join(f"{key}=${{{key}}}" for key in keys)
+        parameters["storage.location.template"] = table_location(table_name, bucket) + template
+    return parameters
+
+
+def glue_table_input(table_name, bucket, year_range=None):
+    """
+    TableInput for glue.create_table / glue.update_table
+    """
+    keys = partition_keys(table_name)
+    if table_name == "raw_orders":
+        formats = (JSON_INPUT_FORMAT, JSON_OUTPUT_FORMAT, JSON_SERDE)
+    else:
+        formats = (PARQUET_INPUT_FORMAT, PARQUET_OUTPUT_FORMAT, PARQUET_SERDE)
+    return {
+        "Name": table_name,
+        "TableType": "EXTERNAL_TABLE",
+        "Parameters": table_parameters(table_name, bucket, year_range),
+        "PartitionKeys": [
+            {"Name": name, "Type": data_type}
+            for name, data_type in table_columns(table_name) if name in keys
+        ],
+        "StorageDescriptor": {
+            "Columns": [
+                {"Name": name, "Type": data_type}
+                for name, data_type in table_columns(table_name) if name not in keys
+            ],
+            "Location": table_location(table_name, bucket),
+            "InputFormat": formats[0],
+            "OutputFormat": formats[1],
+            "SerdeInfo": {"SerializationLibrary": formats[2]},
+        },
+    }
+
+
+def athena_ddl(table_name, bucket, database=None, year_range=None):
+    """
+    CREATE EXTERNAL TABLE statement equivalent to glue_table_input()
+    """
+    table_input = glue_table_input(table_name, bucket, year_range)
+    storage = table_input["StorageDescriptor"]
+    qualified = f"`{database}`.`{table_name}`" if database else f"`{table_name}`"
+    columns = ",\n".join(f"  `{c['Name']}` {c['Type']}" for c in storage["Columns"])
+
+    ddl = f"CREATE EXTERNAL TABLE IF NOT EXISTS {qualified} (\n{columns}\n)\n"
+    if table_input["PartitionKeys"]:
+        partitions = ", ".join(f"`{c['Name']}` {c['Type']}" for c in table_input["PartitionKeys"])
+        ddl += f"PARTITIONED BY ({partitions})\n"
+    if storage["SerdeInfo"]["SerializationLibrary"] == PARQUET_SERDE:
+        ddl += "STORED AS PARQUET\n"
+    else:
+        ddl += f"ROW FORMAT SERDE '{storage['SerdeInfo']['SerializationLibrary']}'\n"
+        ddl += f"STORED AS INPUTFORMAT '{storage['InputFormat']}'\n"
+        ddl += f"OUTPUTFORMAT '{storage['OutputFormat']}'\n"
+    ddl += f"LOCATION '{storage['Location']}'\n"
+    properties = ",\n".join(
+        f"  '{k}'='{v}'" for k, v in table_input["Parameters"].items() if k != "EXTERNAL")
+    ddl += f"TBLPROPERTIES (\n{properties}\n);"
+    return ddl
+
+
+def register_tables(glue_client, database, bucket, order_years=()):
+    """
+    Create or update every table in the Glue catalog. order_years are the
+    order_year values just written to processed_orders; the projection range
+    is widened to cover them and never narrowed.
+    """
+    for table_name in table_names():
+        year_range = None
+        if table_name == "processed_orders":
+            try:
+                existing = glue_client.get_table(DatabaseName=database, Name=table_name)
+                existing_range = existing["Table"].get("Parameters", {}).get(
+                    "projection.order_year.range")
+            except glue_client.exceptions.EntityNotFoundException:
+                existing_range = None
+            year_range = order_year_range(order_years, existing_range)
+
+        table_input = glue_table_input(table_name, bucket, year_range)
+        try:
+            glue_client.update_table(DatabaseName=database, TableInput=table_input)
+            print(f"Updated catalog table {database}.{table_name}")
+        except glue_client.exceptions.EntityNotFoundException:
+            glue_client.create_table(DatabaseName=database, TableInput=table_input)
+            print(f"Created catalog table {database}.{table_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print Athena DDL for the data lake tables")
+    parser.add_argument("--bucket", required=True, help="Data lake bucket name")
+    parser.add_argument("--database", help="Glue database name")
+    parser.add_argument("--table", choices=table_names(), help="Only print this table")
+    parser.add_argument("--order-years", help="order_year projection range LOW,HIGH "
+                                              "(default: the current year)")
+    parser.add_argument("--register", action="store_true",
+                        help="Create/update the tables in the Glue catalog instead of printing DDL")
+    args = parser.parse_args()
+
+    if args.register:
+        if not args.database:
+            parser.error("--register needs --database")
+        import boto3
+        years = args.order_years.split(",") if args.order_years else ()
+        register_tables(boto3.client("glue"), args.database, args.bucket, years)
+        return
+
+    year_range = order_year_range([], args.order_years)
+    for table_name in [args.table] if args.table else table_names():
+        print(athena_ddl(table_name, args.bucket, args.database, year_range))
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -124,3 +124,20 @@ resource "aws_iam_role_policy" "glue_s3_policy" {
     }]
   })
 }
+
+# Attach to the roles/users of services allowed to read customer order history
+resource "aws_iam_policy" "orders_api_invoke" {
+  name        = "${local.name_prefix}-orders-api-invoke"
+  description = "Invoke GET /orders/{customer_id} on the query API"
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect   = "Allow"
+      Action   = "execute-api:Invoke"
+      Resource = "${aws_api_gateway_rest_api.data_ingestion.execution_arn}/*/GET/orders/*"
+    }]
+  })
+
+  tags = local.common_tags
+}
@@ -0,0 +1,190 @@
+import os
+import zlib
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Unsharded index: one GSI partition key per customer
+CUSTOMER_INDEX_NAME = 'CustomerIdIndex'
+
+# Write-sharded index: customer_id#N spreads a customer's writes over N keys
+SHARDED_INDEX_NAME = 'CustomerShardIndex'
+SHARD_KEY_ATTRIBUTE = 'customer_shard'
+SORT_KEY_ATTRIBUTE = 'order_date'
+
+# Attributes of an ExclusiveStartKey (index keys + table key)
+CUSTOMER_INDEX_KEYS = ['order_id', 'customer_id']
+SHARDED_INDEX_KEYS = ['order_id', SHARD_KEY_ATTRIBUTE, SORT_KEY_ATTRIBUTE]
+
+
+def _env_count(name, default=0):
+    try:
+        return max(int(os.environ.get(name, default)), 0)
+    except ValueError:
+        return 0
+
+
+def get_shard_count():
+    """
+    Number of write shards per customer, 0 when sharding is disabled
+    """
+    return _env_count('ORDERS_WRITE_SHARDS')
+
+
+def get_read_shard_count():
+    """
+    Number of shards readers query, 0 to read CustomerIdIndex.
+
+    Stays 0 while existing orders are backfilled with customer_shard, so
+    orders written before sharding was enabled remain visible.
+    """
+    return _env_count('ORDERS_READ_SHARDS', get_shard_count())
+
+
+def shard_key(customer_id, order_id, shard_count):
+    """
+    Build the sharded GSI key for an order.
+
+    The shard is derived from the order_id (not picked at random) so that a
+    retried Kinesis batch rewrites the item with the same key.
+    """
+    shard = zlib.crc32(str(order_id).encode('utf-8')) % shard_count
+    return f"{customer_id}#{shard}"
+
+
+def _query_page(table, index_name, key_name, key_value, limit, start_key, query_kwargs):
+    """
+    Run a single Query page against one GSI partition key
+    """
+    params = dict(query_kwargs)
+    params['IndexName'] = index_name
+    params['KeyConditionExpression'] = '#pk = :pk'
+    # Keep caller supplied attribute names (e.g. for a ProjectionExpression)
+    params['ExpressionAttributeNames'] = {
+        **query_kwargs.get('ExpressionAttributeNames', {}),
+        '#pk': key_name
+    }
+    params['ExpressionAttributeValues'] = {
+        **query_kwargs.get('ExpressionAttributeValues', {}),
+        ':pk': key_value
+    }
+    if index_name == SHARDED_INDEX_NAME:
+        # Newest orders first within each shard
+        params['ScanIndexForward'] = False
+    if limit:
+        params['Limit'] = limit
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+
+    response = table.query(**params)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def _start_key(item):
+    """
+    ExclusiveStartKey that resumes a shard right after this item
+    """
+    return {name: item[name] for name in SHARDED_INDEX_KEYS}
+
+
+def validate_start_keys(start_keys, shard_count, customer_id=None):
+    """
+    Raise ValueError unless start_keys is a continuation token for shard_count.
+
+    Each non-empty key must hold exactly the index and table key attributes
+    as strings; with customer_id given it must also point into that
+    customer's partition (shard).
+    """
+    expected = max(shard_count, 1)
+    if not isinstance(start_keys, list) or len(start_keys) != expected or \
+            any(key is not None and not isinstance(key, dict) for key in start_keys):
+        raise ValueError(f"start_keys must hold {expected} continuation key(s)")
+
+    key_names = SHARDED_INDEX_KEYS if shard_count > 0 else CUSTOMER_INDEX_KEYS
+    for shard, key in enumerate(start_keys):
+        if not key:
+            continue
+        if sorted(key) != sorted(key_names) or \
+                any(not isinstance(value, str) for value in key.values()):
+            raise ValueError(f"continuation keys must hold {', '.join(key_names)}")
+        if customer_id is None:
+            continue
+        if shard_count > 0:
+            partition_name, partition = SHARD_KEY_ATTRIBUTE, f"{customer_id}#{shard}"
+        else:
+            partition_name, partition = 'customer_id', customer_id
+        if key[partition_name] != partition:
+            raise ValueError("continuation key belongs to another customer")
+
+
+def query_customer_orders(table, customer_id, shard_count=None, limit=None,
+                          start_keys=None, max_workers=8, **query_kwargs):
+    """
+    Fetch one page of a customer's orders from the orders table.
+
+    With sharding disabled this is a plain Query on CustomerIdIndex, which
+    has no sort key, so orders come back in index order, not by date. With
+    sharding enabled the shards are queried in parallel and their pages are
+    merged newest-first. Returns (items, next_keys) where next_keys holds one
+    continuation key per shard - {} for a shard not read yet, None once a
+    shard is exhausted - or None when every shard has been read to the end.
+    Items must include SHARDED_INDEX_KEYS (mind any ProjectionExpression).
+
+    Raises ValueError when start_keys is not a token for this customer and
+    shard count.
+    """
+    if shard_count is None:
+        shard_count = get_read_shard_count()
+
+    if shard_count <= 0:
+        if start_keys is not None:
+            validate_start_keys(start_keys, shard_count, customer_id)
+        start_key = start_keys[0] if start_keys else None
+        items, last_key = _query_page(
+            table, CUSTOMER_INDEX_NAME, 'customer_id', customer_id,
+            limit, start_key, query_kwargs)
+        return items, ([last_key] if last_key else None)
+
+    if start_keys is None:
+        start_keys = [{}] * shard_count
+    validate_start_keys(start_keys, shard_count, customer_id)
+
+    # Only shards that still have a continuation key are read again
+    pending = [shard for shard, key in enumerate(start_keys) if key is not None]
+    if not pending:
+        return [], None
+
+    # Every shard may hold the next `limit` newest orders, so each one is
+    # asked for a full page and the merge is trimmed back to the limit
+    def fetch(shard):
+        return _query_page(
+            table, SHARDED_INDEX_NAME, SHARD_KEY_ATTRIBUTE,
+            f"{customer_id}#{shard}", limit, start_keys[shard],
+            query_kwargs)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        pages = dict(zip(pending, executor.map(fetch, pending)))
+
+    # Each shard page is already sorted newest-first on the index sort key
+    merged = heapq.merge(
+        *([(shard, item) for item in items] for shard, (items, _) in pages.items()),
+        key=lambda entry: str(entry[1].get(SORT_KEY_ATTRIBUTE, '')),
+        reverse=True
+    )
+    page = list(itertools.islice(merged, limit)) if limit else list(merged)
+
+    emitted = dict.fromkeys(pending, 0)
+    for shard, _ in page:
+        emitted[shard] += 1
+
+    next_keys = list(start_keys)
+    for shard, (items, last_key) in pages.items():
+        if emitted[shard] == len(items):
+            next_keys[shard] = last_key
+        elif emitted[shard]:
+            next_keys[shard] = _start_key(items[emitted[shard] - 1])
+        # else: nothing emitted, the shard resumes from the same key
+
+    items = [item for _, item in page]
+    return items, (next_keys if any(key is not None for key in next_keys) else None)
@@ -0,0 +1,354 @@
+import json
+import base64
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from customer_orders import (
+    query_customer_orders, get_read_shard_count, validate_start_keys, SHARDED_INDEX_KEYS
+)
+
+
+# Precomputed tables written by the Glue ETL job under analytics-results/api/,
+# with the dimension columns each one can be filtered on
+ANALYTICS_TABLES = {
+    'daily_summary': ['order_year', 'order_month', 'order_day', 'order_weekday', 'is_weekend'],
+    'daily_category_summary': ['order_year', 'order_month', 'order_day', 'category'],
+    'product_performance': ['product_name', 'category'],
+    'customer_segments': ['customer_segment', 'customer_location', 'is_prime_member'],
+    'payment_device_analysis': ['payment_method', 'device_type'],
+    'hourly_patterns': ['order_hour', 'day_part']
+}
+
+# Estimates from the stratified sample, with <metric>_moe margins of error
+ANALYTICS_TABLES.update({
+    f'approx_{name}': columns for name, columns in list(ANALYTICS_TABLES.items())
+})
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+FIELD_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+DATE_PATTERN = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+
+
+class TTLCache:
+    """
+    Small in-container LRU cache whose entries expire after ttl seconds.
+
+    Warm Lambda containers keep module state between invocations, so repeated
+    reads of the same customer page or analytics table skip the backend.
+    """
+
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self, key):
+        """
+        Return an entry even if it has expired, for revalidation
+        """
+        entry = self._entries.get(key)
+        return entry[1] if entry else None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+cache = TTLCache(
+    max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 256)),
+    ttl=int(os.environ.get('CACHE_TTL_SECONDS', 60))
+)
+
+# AWS clients are created on first use and reused by warm containers
+_orders_table = None
+_s3 = None
+
+
+def get_orders_table():
+    global _orders_table
+    if _orders_table is None:
+        import boto3
+        _orders_table = boto3.resource('dynamodb').Table(
+            os.environ['DYNAMODB_ORDERS_TABLE'])
+    return _orders_table
+
+
+def get_s3():
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client('s3')
+    return _s3
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def _etag(body):
+    return '"' + hashlib.sha1(body.encode('utf-8')).hexdigest() + '"'
+
+
+def _encode_token(start_keys):
+    raw = json.dumps(start_keys, default=_json_default)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('utf-8')
+
+
+def _decode_token(token):
+    return json.loads(base64.urlsafe_b64decode(token.encode('utf-8')))
+
+
+def _response(status_code, body=None, etag=None, cache_status=None):
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type, If-None-Match',
+        # Errors must not be reused by browsers or proxies once the cause is fixed
+        'Cache-Control': f'private, max-age={cache.ttl}'
+        if status_code in (200, 304) else 'no-store'
+    }
+    if etag:
+        headers['ETag'] = etag
+    if cache_status:
+        headers['X-Cache'] = cache_status
+    return {
+        'statusCode': status_code,
+        'headers': headers,
+        'body': body if body is not None else ''
+    }
+
+
+def _error(status_code, message):
+    return _response(status_code, json.dumps({'error': message}))
+
+
+def _conditional(event, entry, cache_status):
+    """
+    Answer 304 when the client already holds the current representation
+    """
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if headers.get('if-none-match') == entry['etag']:
+        return _response(304, etag=entry['etag'], cache_status=cache_status)
+    return _response(200, entry['body'], etag=entry['etag'], cache_status=cache_status)
+
+
+def fetch_customer_orders(customer_id, limit, start_keys, fields):
+    """
+    Read one page of a customer's orders from the customer GSI
+    (newest-first when sharded, index order otherwise)
+    """
+    shard_count = get_read_shard_count()
+    query_kwargs = {}
+    if fields:
+        # The index keys are needed to merge sharded pages newest-first
+        # and to resume each shard after the last order returned
+        projected = list(dict.fromkeys(fields + SHARDED_INDEX_KEYS))
+        names = {f'#f{i}': name for i, name in enumerate(projected)}
+        query_kwargs['ProjectionExpression'] = ', '.join(names)
+        query_kwargs['ExpressionAttributeNames'] = names
+
+    items, next_keys = query_customer_orders(
+        get_orders_table(), customer_id, shard_count=shard_count,
+        limit=limit, start_keys=start_keys, **query_kwargs)
+
+    if fields:
+        items = [{k: v for k, v in item.items() if k in fields} for item in items]
+
+    return {
+        'customer_id': customer_id,
+        'orders': items,
+        'count': len(items),
+        'next_token': _encode_token(next_keys) if next_keys else None
+    }
+
+
+def _list_result_parts(table_name):
+    bucket = os.environ['S3_BUCKET']
+    prefix = f"analytics-results/api/{table_name}/"
+    response = get_s3().list_objects_v2(Bucket=bucket, Prefix=prefix)
+    return [obj for obj in response.get('Contents', [])
+            if obj['Key'].endswith('.json') and obj.get('Size', 0) > 0]
+
+
+def fetch_analytics_table(table_name, parts):
+    """
+    Load a precomputed analytics table (JSON lines written by the ETL job)
+    """
+    bucket = os.environ['S3_BUCKET']
+    rows = []
+    for part in sorted(parts, key=lambda obj: obj['Key']):
+        body = get_s3().get_object(Bucket=bucket, Key=part['Key'])['Body'].read()
+        rows.extend(json.loads(line) for line in body.decode('utf-8').splitlines() if line.strip())
+    return {'table': table_name, 'rows': rows, 'count': len(rows)}
+
+
+def handle_customer_orders(event, customer_id):
+    params = event.get('queryStringParameters') or {}
+
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return _error(400, 'limit must be an integer')
+
+    fields = [f.strip() for f in params.get('fields', '').split(',') if f.strip()]
+    if any(not FIELD_PATTERN.match(f) for f in fields):
+        return _error(400, 'fields must be a comma separated list of attribute names')
+
+    next_token = params.get('next_token')
+    cache_key = ('orders', customer_id, limit, next_token, tuple(fields))
+
+    entry = cache.get(cache_key)
+    if entry:
+        return _conditional(event, entry, 'HIT')
+
+    try:
+        start_keys = _decode_token(next_token) if next_token else None
+        if start_keys is not None:
+            # A token from before a shard count change (or for another
+            # customer) would fail in DynamoDB instead
+            validate_start_keys(start_keys, get_read_shard_count(), customer_id)
+    except ValueError:
+        return _error(400, 'invalid next_token')
+
+    result = fetch_customer_orders(customer_id, limit, start_keys, fields)
+    body = json.dumps(result, default=_json_default)
+    entry = {'body': body, 'etag': _etag(body)}
+    cache.put(cache_key, entry)
+    return _conditional(event, entry, 'MISS')
+
+
+def _analytics_filters(params, table_name):
+    """
+    Equality filters on a table's dimension columns from the query string.
+    date=YYYY-MM-DD is shorthand for order_year, order_month and order_day.
+    """
+    columns = ANALYTICS_TABLES[table_name]
+    filters = {}
+    for name, value in params.items():
+        if name == 'date':
+            match = DATE_PATTERN.match(value)
+            if not match or 'order_day' not in columns:
+                raise ValueError(f"date is not a YYYY-MM-DD filter on '{table_name}'")
+            for column, part in zip(['order_year', 'order_month', 'order_day'], match.groups()):
+                filters[column] = str(int(part))
+        elif name in columns:
+            if value.lower() in ('true', 'false'):
+                value = value.lower()
+            elif value.isdigit():
+                value = str(int(value))
+            filters[name] = value
+        else:
+            raise ValueError(f"'{name}' is not a filter on '{table_name}' "
+                             f"(use date or one of {', '.join(columns)})")
+    return filters
+
+
+def _filter_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _analytics_entry(table_name):
+    """
+    Cached (entry, cache_status) for a whole analytics table, None before the first ETL run
+    """
+    cache_key = ('analytics', table_name)
+    entry = cache.get(cache_key)
+    if entry:
+        return entry, 'HIT'
+
+    # Expired entries are revalidated against the S3 object ETags so an
+    # unchanged table costs one LIST instead of re-reading every part
+    parts = _list_result_parts(table_name)
+    if not parts:
+        return None
+    source_etag = _etag(','.join(obj['ETag'] for obj in sorted(parts, key=lambda o: o['Key'])))
+
+    stale = cache.get_stale(cache_key)
+    if stale and stale['source_etag'] == source_etag:
+        cache.put(cache_key, stale)
+        return stale, 'REVALIDATED'
+
+    result = fetch_analytics_table(table_name, parts)
+    body = json.dumps(result, default=_json_default)
+    entry = {'body': body, 'etag': _etag(body), 'source_etag': source_etag,
+             'rows': result['rows']}
+    cache.put(cache_key, entry)
+    return entry, 'MISS'
+
+
+def handle_analytics(event, table_name):
+    if table_name not in ANALYTICS_TABLES:
+        return _error(404, f"Unknown analytics table '{table_name}'")
+
+    try:
+        filters = _analytics_filters(event.get('queryStringParameters') or {}, table_name)
+    except ValueError as e:
+        return _error(400, str(e))
+
+    cached = _analytics_entry(table_name)
+    if cached is None:
+        return _error(404, f"No results yet for '{table_name}'")
+    entry, cache_status = cached
+
+    if filters:
+        # Filtering the cached rows is cheap next to a backend read
+        rows = [row for row in entry['rows']
+                if all(_filter_value(row.get(k)) == v for k, v in filters.items())]
+        body = json.dumps({'table': table_name, 'filters': filters, 'rows': rows,
+                           'count': len(rows)}, default=_json_default)
+        entry = {'body': body, 'etag': _etag(body)}
+    return _conditional(event, entry, cache_status)
+
+
+def lambda_handler(event, context):
+    """
+    Lambda function serving read-side queries over DynamoDB and analytics results
+
+    GET /orders/{customer_id}?limit=&next_token=&fields=a,b,c
+    GET /analytics/{table_name}?date=YYYY-MM-DD&category=...
+    """
+    path_params = event.get('pathParameters') or {}
+    resource = event.get('resource') or event.get('path') or ''
+
+    try:
+        if event.get('httpMethod', 'GET') != 'GET':
+            return _error(405, 'Only GET is supported')
+        if path_params.get('customer_id'):
+            return handle_customer_orders(event, path_params['customer_id'])
+        if path_params.get('table_name'):
+            return handle_analytics(event, path_params['table_name'])
+        return _error(404, f"No route for '{resource}'")
+    except Exception as e:
+        print(f"Error serving query {resource}: {str(e)}")
+        return _error(500, 'Internal error')
@@ -4,6 +4,7 @@ import base64
 from datetime import datetime
 import os
 from decimal import Decimal
+from customer_orders import get_shard_count, shard_key, SHARD_KEY_ATTRIBUTE
 
 
 def lambda_handler(event, context):
@@ -19,6 +20,7 @@ def lambda_handler(event, context):
     orders_table_name = os.environ['DYNAMODB_ORDERS_TABLE']
 
     orders_table = dynamodb.Table(orders_table_name)
+    write_shards = get_shard_count()
 
     processed_records = 0
     failed_records = []
@@ -82,6 +84,12 @@ def lambda_handler(event, context):
                 # Convert float to Decimal for DynamoDB
                 dynamodb_payload = json.loads(
                     json.dumps(payload), parse_float=Decimal)
+                # Spread hot customers over several GSI partition keys
+                # (orders without a customer are stored, just not indexed)
+                customer_id = payload.get('customer_id')
+                if write_shards and customer_id:
+                    dynamodb_payload[SHARD_KEY_ATTRIBUTE] = shard_key(
+                        customer_id, payload['order_id'], write_shards)
                 orders_table.put_item(Item=dynamodb_payload)
                 print(f"Stored order {payload['order_id']} in DynamoDB")
             except Exception as e:
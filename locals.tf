@@ -16,6 +16,12 @@ locals {
   kinesis_shards = var.environment == "prod" ? 2 : 1
   lambda_memory  = var.environment == "prod" ? 512 : 256
   log_retention  = var.environment == "prod" ? 30 : 7
+
+  # Orders customer indexes: CustomerIdIndex is dropped once sharding is fully
+  # enabled, so hot customers no longer write to a single GSI partition key.
+  # Readers use the sharded index only after the migration has finished.
+  orders_customer_index = var.orders_write_shards == 0 || var.orders_shard_migration
+  orders_read_shards    = var.orders_shard_migration ? 0 : var.orders_write_shards
 }
 
 resource "random_string" "suffix" {
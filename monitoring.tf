@@ -17,6 +17,13 @@ resource "aws_cloudwatch_log_group" "lambda_stream_processor" {
   tags = local.common_tags
 }
 
+resource "aws_cloudwatch_log_group" "lambda_query_api" {
+  name              = "/aws/lambda/${aws_lambda_function.query_api.function_name}"
+  retention_in_days = local.log_retention
+
+  tags = local.common_tags
+}
+
 resource "aws_cloudwatch_log_group" "glue_job" {
   name              = "/aws-glue/jobs/${aws_glue_job.etl_job.name}"
   retention_in_days = local.log_retention
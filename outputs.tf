@@ -2,6 +2,16 @@ output "api_endpoint" {
   description = "API Gateway endpoint URL"
   value       = "https://${aws_api_gateway_rest_api.data_ingestion.id}.execute-api.${var.aws_region}.amazonaws.com/${var.environment}/generate"
 }
+output "query_api_endpoint" {
+  description = "Query API base URL (GET /orders/{customer_id}, GET /analytics/{table_name})"
+  value       = "https://${aws_api_gateway_rest_api.data_ingestion.id}.execute-api.${var.aws_region}.amazonaws.com/${var.environment}"
+}
+
+output "orders_api_invoke_policy_arn" {
+  description = "IAM policy that allows signed calls to GET /orders/{customer_id}"
+  value       = aws_iam_policy.orders_api_invoke.arn
+}
+
 output "s3_bucket" {
   description = "S3 data lake bucket name"
   value       = aws_s3_bucket.data_lake.id
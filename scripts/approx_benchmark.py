@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark the approximate analytics path against the exact one.
+
+Generates processed orders shaped like the ETL output, answers the summary
+queries exactly over all rows (summary_tables.summarize_rows, the plain-Python
+twin of the job's Spark aggregations) and approximately from a stratified
+sample, and reports latency, data scanned (with the Athena price it implies)
+and accuracy: relative error per metric and how often the exact value falls
+inside the reported 95% margin of error.
+
+Usage:
+    python scripts/approx_benchmark.py --rows 200000 --fraction 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'glue_scripts'))
+from approx_analytics import MIN_MOE_ROWS, approx_summaries, stratified_sample  # noqa: E402
+from summary_tables import SUMMARIES, summarize_rows  # noqa: E402
+from order_fixtures import processed_orders  # noqa: E402
+
+
+ATHENA_USD_PER_TB = 5.0
+ATHENA_MIN_BYTES = 10 * 1024 * 1024
+
+
+def timed(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def athena_cost(rows, row_bytes):
+    return max(rows * row_bytes, ATHENA_MIN_BYTES) / 1024 ** 4 * ATHENA_USD_PER_TB
+
+
+def accuracy(exact, approx):
+    """
+    Per table: median relative error by aggregate (ratios included), the
+    share of estimates that carry a margin of error and how often the exact
+    value falls inside it. Metrics approx_<table> leaves NULL are listed as
+    not estimated rather than skipped.
+    """
+    report = {}
+    for table, spec in SUMMARIES.items():
+        exact_rows = {tuple(r[k] for k in spec['keys']): r for r in exact[table]}
+        columns = [(name, aggregate) for name, aggregate, _ in spec['metrics']]
+        columns += [(name, 'ratio') for name, _, _ in spec['ratios']]
+        errors = defaultdict(list)
+        missing = set()
+        covered = with_moe = moe_columns = 0
+        for row in approx[table]:
+            truth = exact_rows.get(tuple(row[k] for k in spec['keys']))
+            if truth is None:
+                continue
+            for name, aggregate in columns:
+                if row[name] is None:
+                    missing.add(aggregate)
+                    continue
+                if truth[name] in (None, 0):
+                    continue
+                errors[aggregate].append(abs(row[name] - truth[name]) / abs(truth[name]))
+                if f'{name}_moe' not in row:
+                    continue
+                moe_columns += 1
+                if row[f'{name}_moe'] is not None:
+                    with_moe += 1
+                    covered += abs(row[name] - truth[name]) <= row[f'{name}_moe']
+        report[table] = {
+            'groups': f"{len(approx[table])}/{len(exact[table])}",
+            'errors': {k: statistics.median(v) for k, v in errors.items()},
+            'not_estimated': sorted(missing - set(errors)),
+            'with_moe': with_moe / moe_columns if moe_columns else None,
+            'coverage': covered / with_moe if with_moe else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--fraction', type=float, default=0.05,
+                        help='Fraction of each stratum kept in the sample')
+    parser.add_argument('--min-per-stratum', type=int, default=2)
+    parser.add_argument('--row-bytes', type=int, default=120,
+                        help='Assumed parquet bytes scanned per row by a summary query')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = processed_orders(args.rows, args.seed)
+    sample, sample_seconds = timed(
+        stratified_sample, rows, args.fraction, args.min_per_stratum, args.seed, repeat=1)
+
+    exact, exact_seconds = timed(summarize_rows, rows)
+    approx, approx_seconds = timed(approx_summaries, sample)
+
+    strata = len({r['stratum_id'] for r in sample})
+    print(f"{len(rows)} orders, {strata} strata (date x category x segment), "
+          f"sample {len(sample)} rows ({len(sample) / len(rows):.1%}), "
+          f"built once per run in {sample_seconds:.2f}s")
+    queries = len(SUMMARIES)
+    print(f"\n{'path':<8} {'rows scanned':>13} {'MB scanned':>11} {'latency s':>10} "
+          f"{f'athena $ ({queries} queries)':>21}")
+    for label, count, seconds in [('exact', len(rows), exact_seconds),
+                                  ('approx', len(sample), approx_seconds)]:
+        print(f"{label:<8} {count:>13} {count * args.row_bytes / 1024 ** 2:>11.2f} "
+              f"{seconds:>10.3f} {queries * athena_cost(count, args.row_bytes):>21.6f}")
+    print(f"Speedup: {exact_seconds / approx_seconds:.1f}x  "
+          f"(Athena bills at least {ATHENA_MIN_BYTES // 1024 ** 2} MB per query, "
+          f"so small tables hit the floor on both paths)")
+
+    print(f"\n{'table':<24} {'groups':>9} {'with moe':>9} {'95% cover':>10}  "
+          f"median relative error by aggregate")
+    for table, r in accuracy(exact, approx).items():
+        with_moe = f"{r['with_moe']:.0%}" if r['with_moe'] is not None else 'n/a'
+        coverage = f"{r['coverage']:.1%}" if r['coverage'] is not None else 'n/a'
+        errors = [f"{k} {v:.2%}" for k, v in sorted(r['errors'].items())]
+        errors += [f"{k} not estimated" for k in r['not_estimated']]
+        print(f"{table:<24} {r['groups']:>9} {with_moe:>9} {coverage:>10}  {', '.join(errors)}")
+    print(f"(margins of error need at least {MIN_MOE_ROWS} sample rows per group)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Backfill customer_shard on orders written before write sharding was enabled.
+
+CustomerShardIndex only holds items that carry customer_shard, so orders
+stored before `orders_write_shards` was set are invisible to sharded reads
+until this script has stamped them. Run it while `orders_shard_migration`
+is true (both customer indexes exist, readers still use CustomerIdIndex),
+then switch the migration flag off. The script is idempotent: items that
+already have the expected shard key are skipped.
+
+Usage:
+    python scripts/backfill_customer_shards.py --table <orders-table> --shards 4
+    python scripts/backfill_customer_shards.py --table <orders-table> --shards 4 --dry-run
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda_functions'))
+from customer_orders import SHARD_KEY_ATTRIBUTE, shard_key  # noqa: E402
+
+
+def scan_orders(table, segment, total_segments):
+    params = {
+        'ProjectionExpression': '#o, #c, #s',
+        'ExpressionAttributeNames': {
+            '#o': 'order_id', '#c': 'customer_id', '#s': SHARD_KEY_ATTRIBUTE
+        },
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    while True:
+        response = table.scan(**params)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def backfill(table, shard_count, segment=0, total_segments=1, dry_run=False):
+    """
+    Stamp customer_shard on every order missing it; returns (scanned, updated, skipped)
+    """
+    scanned = updated = skipped = 0
+    for item in scan_orders(table, segment, total_segments):
+        scanned += 1
+        if not item.get('customer_id'):
+            skipped += 1
+            continue
+        expected = shard_key(item['customer_id'], item['order_id'], shard_count)
+        if item.get(SHARD_KEY_ATTRIBUTE) == expected:
+            continue
+        if not dry_run:
+            # Only fill in the key; never create items the stream processor
+            # has not written (e.g. an order deleted during the scan)
+            table.update_item(
+                Key={'order_id': item['order_id']},
+                UpdateExpression='SET #s = :s',
+                ConditionExpression='attribute_exists(order_id)',
+                ExpressionAttributeNames={'#s': SHARD_KEY_ATTRIBUTE},
+                ExpressionAttributeValues={':s': expected}
+            )
+        updated += 1
+    return scanned, updated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--table', required=True, help='Orders table name')
+    parser.add_argument('--shards', type=int, required=True,
+                        help='Must match orders_write_shards')
+    parser.add_argument('--segment', type=int, default=0,
+                        help='Parallel scan segment handled by this run')
+    parser.add_argument('--total-segments', type=int, default=1)
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Count the items that would be updated')
+    args = parser.parse_args()
+    if args.shards <= 0:
+        parser.error('--shards must be positive')
+
+    import boto3
+    table = boto3.resource('dynamodb').Table(args.table)
+
+    scanned, updated, skipped = backfill(
+        table, args.shards, args.segment, args.total_segments, args.dry_run)
+    action = 'would update' if args.dry_run else 'updated'
+    print(f"Scanned {scanned} orders, {action} {updated}, "
+          f"skipped {skipped} without customer_id")
+
+
+if __name__ == '__main__':
+    main()
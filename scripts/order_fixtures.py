@@ -0,0 +1,172 @@
+"""
+Orders for the local scripts and tests: captured files or synthetic ones.
+
+raw_orders() generates orders like lambda_functions/data_generator.py
+(optionally with a Zipf-skewed customer mix), stream_order() adds the fields
+lambda_functions/stream_processor.py derives before writing an order to S3,
+and processed_orders() derives the processed_orders columns the way
+glue_scripts/etl_job.py does.
+"""
+import json
+import os
+import random
+import uuid
+from datetime import datetime, timedelta
+
+
+PRODUCTS = ['Laptop', 'Smartphone', 'Tablet', 'Headphones', 'Smartwatch',
+            'Camera', 'Keyboard', 'Mouse', 'Monitor', 'Speaker',
+            'USB Drive', 'External HDD', 'Webcam', 'Microphone', 'Router',
+            'Printer', 'Scanner', 'Desk Lamp', 'Power Bank', 'Cable Set']
+CATEGORIES = ['Electronics', 'Computers', 'Accessories', 'Audio', 'Networking',
+              'Storage', 'Mobile', 'Gaming', 'Office', 'Smart Home']
+LOCATIONS = ['NY', 'CA', 'TX', 'FL', 'IL', 'PA', 'OH', 'GA', 'NC', 'MI']
+PAYMENT_METHODS = ['Credit Card', 'Debit Card', 'PayPal', 'Apple Pay', 'Google Pay', 'Amazon Pay']
+SHIPPING_METHODS = ['Standard', 'Express', 'Next Day', 'Two Day', 'Economy']
+DEVICE_TYPES = ['Mobile', 'Desktop', 'Tablet', 'App iOS', 'App Android']
+REFERRAL_SOURCES = ['Direct', 'Google', 'Facebook', 'Email', 'Instagram']
+PROMO_CODES = [None, 'SAVE10', 'FREESHIP', 'WELCOME20']
+
+
+def load_orders(paths):
+    """
+    Read orders from .json (array, as in raw-data/) or .jsonl files (as in processed-data/)
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names)
+                             if n.endswith(('.json', '.jsonl')))
+        else:
+            files.append(path)
+
+    orders = []
+    for file_path in sorted(files):
+        with open(file_path) as f:
+            content = f.read().strip()
+        if not content:
+            continue
+        if content.startswith('['):
+            orders.extend(json.loads(content))
+        else:
+            orders.extend(json.loads(line) for line in content.splitlines() if line.strip())
+    return orders
+
+
+def raw_orders(count, seed=42, customers=9000, skew=0.0, days=7):
+    """
+    Orders with data_generator's fields and value ranges.
+
+    Customers are cust_1000 onwards; with skew > 0 their popularity follows a
+    Zipf(skew) law (skew=0 is data_generator's uniform draw).
+    """
+    rng = random.Random(seed)
+    ids = [f'cust_{1000 + i}' for i in range(customers)]
+    weights = None
+    if skew:
+        rng.shuffle(ids)
+        weights = [1 / (rank ** skew) for rank in range(1, customers + 1)]
+
+    now = datetime.now()
+    orders = []
+    for customer_id in rng.choices(ids, weights=weights, k=count):
+        quantity = rng.randint(1, 5)
+        price = round(rng.uniform(10, 2000), 2)
+        discount = rng.choice([0, 5, 10, 15, 20, 25])
+        subtotal = round(price * quantity, 2)
+        discount_amount = round(subtotal * (discount / 100), 2)
+        order_date = now - timedelta(days=rng.randint(0, days), hours=rng.randint(0, 23),
+                                     minutes=rng.randint(0, 59))
+        orders.append({
+            'order_id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'customer_id': customer_id,
+            'product_name': rng.choice(PRODUCTS),
+            'category': rng.choice(CATEGORIES),
+            'quantity': quantity,
+            'price': price,
+            'subtotal': subtotal,
+            'discount_percentage': discount,
+            'discount_amount': discount_amount,
+            'total_amount': round(subtotal - discount_amount, 2),
+            'order_date': order_date.isoformat(),
+            'customer_age': rng.randint(18, 70),
+            'customer_location': rng.choice(LOCATIONS),
+            'payment_method': rng.choice(PAYMENT_METHODS),
+            'shipping_method': rng.choice(SHIPPING_METHODS),
+            'is_prime_member': rng.choice([True, False]),
+            'device_type': rng.choice(DEVICE_TYPES),
+            'session_duration_seconds': rng.randint(30, 1800),
+            'items_viewed': rng.randint(1, 20),
+            'is_returning_customer': rng.choice([True, False]),
+            'referral_source': rng.choice(REFERRAL_SOURCES),
+            'promo_code_used': rng.choice(PROMO_CODES),
+            'estimated_delivery_days': rng.randint(2, 7)
+        })
+    return orders
+
+
+def stream_order(order, sequence_number=0):
+    """
+    Order as stream_processor.py writes it to raw-data/ and processed-data/orders/
+    """
+    ts = datetime.fromisoformat(str(order['order_date']).replace('Z', '+00:00'))
+    age = order.get('customer_age', 0)
+    total = order.get('total_amount', 0)
+    return {
+        **order,
+        'processed_timestamp': datetime.now().isoformat(),
+        'kinesis_sequence_number': str(sequence_number),
+        'kinesis_partition_key': order.get('customer_id'),
+        'customer_segment': ('Gen Z' if age < 25 else 'Millennial' if age < 40
+                             else 'Gen X' if age < 55 else 'Boomer'),
+        'order_year': ts.year,
+        'order_month': ts.month,
+        'order_day': ts.day,
+        'order_hour': ts.hour,
+        'order_weekday': ts.weekday(),
+        'is_weekend': ts.weekday() >= 5,
+        'is_high_value': total > 500,
+        'order_size': ('Small' if total < 50 else 'Medium' if total < 200
+                       else 'Large' if total < 500 else 'Extra Large'),
+    }
+
+
+def process_order(order, batch_id='local'):
+    """
+    processed_orders row for a raw order, derived like etl_job.py
+    """
+    ts = datetime.fromisoformat(str(order['order_date']).replace('Z', '+00:00'))
+    weekday = (ts.isoweekday() % 7) + 1  # Spark dayofweek: 1 = Sunday
+    age = order['customer_age']
+    total = order['total_amount']
+    return {
+        **order,
+        'order_timestamp': ts.isoformat(),
+        'order_year': ts.year,
+        'order_month': ts.month,
+        'order_day': ts.day,
+        'order_hour': ts.hour,
+        'order_weekday': weekday,
+        'order_week': ts.isocalendar()[1],
+        'order_quarter': (ts.month - 1) // 3 + 1,
+        'is_weekend': weekday in (1, 7),
+        'day_part': ('Night' if ts.hour < 6 else 'Morning' if ts.hour < 12
+                     else 'Afternoon' if ts.hour < 18 else 'Evening'),
+        'customer_segment': ('Gen Z' if age < 25 else 'Millennial' if age < 40
+                             else 'Gen X' if age < 55 else 'Boomer' if age < 70 else 'Silent'),
+        'order_size_category': ('Small' if total < 50 else 'Medium' if total < 200
+                                else 'Large' if total < 500 else 'Extra Large'),
+        'is_high_value': total >= 500,
+        'revenue_per_item': total / order['quantity'],
+        'is_discounted': order['discount_percentage'] > 0,
+        'processing_timestamp': datetime.now().isoformat(),
+        'etl_batch_id': batch_id
+    }
+
+
+def processed_orders(count, seed=42, **kwargs):
+    """
+    Rows shaped like the ETL job's processed_orders output
+    """
+    return [process_order(order) for order in raw_orders(count, seed, **kwargs)]
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Offline hot-partition analysis for the orders table's customer GSI.
+
+Replays an order stream (captured raw-data/processed-data files, or a
+generated stream with a skewed customer mix) and reports how the
+CustomerIdIndex writes land on DynamoDB partitions, next to the same stream
+written through the sharded CustomerShardIndex (customer_id#N).
+
+Usage:
+    python scripts/partition_heat.py --generate 20000 --skew 1.2
+    python scripts/partition_heat.py --input ./raw-data/orders --shards 4 8
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda_functions'))
+from customer_orders import shard_key  # noqa: E402
+from order_fixtures import load_orders, raw_orders  # noqa: E402
+
+
+# DynamoDB per-partition write ceiling (WCU per second)
+PARTITION_WCU_LIMIT = 1000
+WCU_BYTES = 1024
+
+
+def partition_of(key, partitions):
+    """
+    Stand-in for DynamoDB's internal hash of the partition key
+    """
+    digest = hashlib.md5(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % partitions
+
+
+def item_wcu(order):
+    return max(1, math.ceil(len(json.dumps(order, default=str)) / WCU_BYTES))
+
+
+def analyze(orders, key_fn, partitions, rate):
+    """
+    Replay the stream at `rate` orders/second and collect per-partition and per-key heat
+    """
+    items = Counter()
+    wcu = Counter()
+    key_wcu = Counter()
+    per_second = defaultdict(Counter)
+
+    for i, order in enumerate(orders):
+        key = key_fn(order)
+        partition = partition_of(key, partitions)
+        cost = item_wcu(order)
+        items[partition] += 1
+        wcu[partition] += cost
+        key_wcu[key] += cost
+        per_second[i // rate][partition] += cost
+
+    peak = Counter()
+    for second in per_second.values():
+        for partition, cost in second.items():
+            peak[partition] = max(peak[partition], cost)
+
+    total = sum(wcu.values())
+    mean = total / partitions
+    return {
+        'partitions': [{
+            'partition': p,
+            'items': items[p],
+            'wcu': wcu[p],
+            'share': wcu[p] / total if total else 0,
+            'peak_wcu_per_sec': peak[p],
+            'throttle_risk': peak[p] > PARTITION_WCU_LIMIT
+        } for p in range(partitions)],
+        'heat_ratio': max(wcu.values()) / mean if mean else 0,
+        'distinct_keys': len(key_wcu),
+        'top_keys': key_wcu.most_common(5)
+    }
+
+
+def print_report(label, report):
+    print(f"\n=== {label} ===")
+    print(f"Distinct GSI keys: {report['distinct_keys']}  "
+          f"hottest/mean partition ratio: {report['heat_ratio']:.2f}")
+    print(f"{'partition':>9} {'items':>8} {'wcu':>8} {'share':>7} {'peak wcu/s':>11}")
+    for p in report['partitions']:
+        heat = '#' * int(round(p['share'] * 50))
+        flag = '  THROTTLE' if p['throttle_risk'] else ''
+        print(f"{p['partition']:>9} {p['items']:>8} {p['wcu']:>8} "
+              f"{p['share']:>7.1%} {p['peak_wcu_per_sec']:>11} {heat}{flag}")
+    print("Hottest keys: " + ', '.join(f"{k} ({v} WCU)" for k, v in report['top_keys']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', nargs='*', default=[],
+                        help='Captured order files or directories (.json/.jsonl)')
+    parser.add_argument('--generate', type=int, default=10000,
+                        help='Number of orders to generate when no --input is given')
+    parser.add_argument('--skew', type=float, default=1.1,
+                        help='Zipf exponent of the generated customer mix (0 = uniform)')
+    parser.add_argument('--customers', type=int, default=9000)
+    parser.add_argument('--partitions', type=int, default=4,
+                        help='Number of GSI partitions to model')
+    parser.add_argument('--rate', type=int, default=1000,
+                        help='Replay rate in orders per second')
+    parser.add_argument('--shards', type=int, nargs='*', default=[4, 8],
+                        help='Write shard counts to compare against the unsharded key')
+    parser.add_argument('--json', action='store_true', help='Emit the report as JSON')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.input:
+        orders = load_orders(args.input)
+        source = f"{len(orders)} captured orders"
+    else:
+        orders = raw_orders(args.generate, args.seed, customers=args.customers, skew=args.skew)
+        source = f"{len(orders)} generated orders (zipf skew {args.skew})"
+
+    orders = [o for o in orders if o.get('customer_id') and o.get('order_id')]
+    if not orders:
+        print("No orders with customer_id and order_id to analyze")
+        sys.exit(1)
+
+    reports = {'customer_id': analyze(
+        orders, lambda o: o['customer_id'], args.partitions, args.rate)}
+    for shards in args.shards:
+        reports[f'customer_id#{shards}'] = analyze(
+            orders, lambda o, n=shards: shard_key(o['customer_id'], o['order_id'], n),
+            args.partitions, args.rate)
+
+    if args.json:
+        print(json.dumps({'source': source, 'reports': reports}, indent=2))
+        return
+
+    print(f"Replaying {source} at {args.rate} orders/s over {args.partitions} partitions")
+    for label, report in reports.items():
+        print_report(label, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the query API Lambda against local stand-ins.
+
+DynamoDB and S3 are replaced by in-memory fakes that sleep for a configurable
+round-trip time, so the run shows how much backend latency the in-container
+TTL/LRU cache and ETag revalidation save for a skewed read mix.
+
+Usage:
+    python scripts/query_benchmark.py --requests 5000 --skew 1.1
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'lambda_functions'))
+os.environ.setdefault('S3_BUCKET', 'local-benchmark-bucket')
+os.environ.setdefault('DYNAMODB_ORDERS_TABLE', 'local-benchmark-orders')
+import query_api  # noqa: E402
+from customer_orders import (  # noqa: E402
+    CUSTOMER_INDEX_KEYS, SHARDED_INDEX_KEYS, SHARD_KEY_ATTRIBUTE
+)
+from order_fixtures import raw_orders  # noqa: E402
+
+
+class FakeOrdersTable:
+    """
+    Answers Query calls on the customer GSIs from an in-memory order list
+    """
+
+    def __init__(self, orders, latency):
+        self.latency = latency
+        self.calls = 0
+        self.by_key = {}
+        for order in orders:
+            self.by_key.setdefault(order['customer_id'], []).append(order)
+            if 'customer_shard' in order:
+                self.by_key.setdefault(order['customer_shard'], []).append(order)
+        for items in self.by_key.values():
+            items.sort(key=lambda o: o['order_date'], reverse=True)
+
+    def query(self, **params):
+        self.calls += 1
+        time.sleep(self.latency)
+        key_name = params['ExpressionAttributeNames']['#pk']
+        items = self.by_key.get(params['ExpressionAttributeValues'][':pk'], [])
+        start = 0
+        if 'ExclusiveStartKey' in params:
+            last_id = params['ExclusiveStartKey']['order_id']
+            start = next(i for i, o in enumerate(items) if o['order_id'] == last_id) + 1
+        limit = params.get('Limit', len(items))
+        page = items[start:start + limit]
+        response = {'Items': [dict(o) for o in page]}
+        if start + limit < len(items):
+            # CustomerShardIndex sorts on order_date; CustomerIdIndex has no sort key
+            names = SHARDED_INDEX_KEYS if key_name == SHARD_KEY_ATTRIBUTE else CUSTOMER_INDEX_KEYS
+            response['LastEvaluatedKey'] = {name: page[-1][name] for name in names}
+        return response
+
+
+class FakeS3:
+    """
+    Serves analytics-results/api/<table>/part-00000.json objects from memory
+    """
+
+    def __init__(self, tables, latency):
+        self.latency = latency
+        self.calls = 0
+        self.objects = {
+            f"analytics-results/api/{name}/part-00000.json": body
+            for name, body in tables.items()
+        }
+
+    def list_objects_v2(self, Bucket, Prefix):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {'Contents': [
+            {'Key': key, 'Size': len(body), 'ETag': f'"{hash(body) & 0xffffffff:x}"'}
+            for key, body in self.objects.items() if key.startswith(Prefix)
+        ]}
+
+    def get_object(self, Bucket, Key):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {'Body': io.BytesIO(self.objects[Key].encode('utf-8'))}
+
+
+def build_fixtures(customers, orders_per_customer, rng):
+    orders = raw_orders(customers * orders_per_customer // 2, rng.randrange(2 ** 32),
+                        customers=customers)
+    tables = {
+        name: '\n'.join(json.dumps({'row': i, 'total_revenue': rng.uniform(0, 1e5)})
+                        for i in range(50))
+        for name in query_api.ANALYTICS_TABLES
+    }
+    return orders, tables
+
+
+def build_workload(count, customers, skew, analytics_share, etag_share, rng):
+    weights = [1 / (rank ** skew) for rank in range(1, customers + 1)]
+    workload = []
+    for _ in range(count):
+        if rng.random() < analytics_share:
+            event = {'pathParameters': {'table_name': rng.choice(list(query_api.ANALYTICS_TABLES))}}
+        else:
+            customer = rng.choices(range(customers), weights=weights)[0]
+            event = {
+                'pathParameters': {'customer_id': f'cust_{1000 + customer}'},
+                'queryStringParameters': {'limit': '10', 'fields': 'order_id,total_amount'}
+            }
+        event['httpMethod'] = 'GET'
+        event['revalidate'] = rng.random() < etag_share
+        workload.append(event)
+    return workload
+
+
+def run(workload, table, s3, cache_entries, ttl):
+    query_api._orders_table = table
+    query_api._s3 = s3
+    query_api.cache.clear()
+    query_api.cache.max_entries = cache_entries
+    query_api.cache.ttl = ttl
+
+    etags = {}
+    latencies = []
+    not_modified = 0
+    for event in workload:
+        key = json.dumps(event['pathParameters'], sort_keys=True)
+        request = dict(event)
+        if event['revalidate'] and key in etags:
+            request['headers'] = {'If-None-Match': etags[key]}
+
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            response = query_api.lambda_handler(request, None)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if response['statusCode'] == 304:
+            not_modified += 1
+        etags[key] = response['headers'].get('ETag')
+
+    latencies.sort()
+    return {
+        'requests': len(workload),
+        'hit_rate': query_api.cache.hits / max(query_api.cache.hits + query_api.cache.misses, 1),
+        'not_modified': not_modified,
+        'dynamodb_calls': table.calls,
+        's3_calls': s3.calls,
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1],
+        'total_ms': sum(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--customers', type=int, default=2000)
+    parser.add_argument('--skew', type=float, default=1.1,
+                        help='Zipf exponent of customer popularity')
+    parser.add_argument('--analytics-share', type=float, default=0.2,
+                        help='Fraction of requests for analytics tables')
+    parser.add_argument('--etag-share', type=float, default=0.3,
+                        help='Fraction of repeat requests sent with If-None-Match')
+    parser.add_argument('--dynamodb-ms', type=float, default=8.0)
+    parser.add_argument('--s3-ms', type=float, default=25.0)
+    parser.add_argument('--cache-entries', type=int, default=256)
+    parser.add_argument('--ttl', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    orders, tables = build_fixtures(args.customers, 30, rng)
+    workload = build_workload(args.requests, args.customers, args.skew,
+                              args.analytics_share, args.etag_share, rng)
+
+    results = {}
+    for label, entries in [('no cache', 0), ('ttl+lru cache', args.cache_entries)]:
+        table = FakeOrdersTable(orders, args.dynamodb_ms / 1000)
+        s3 = FakeS3(tables, args.s3_ms / 1000)
+        results[label] = run(workload, table, s3, entries, args.ttl)
+
+    print(f"{args.requests} requests, {args.customers} customers (zipf {args.skew}), "
+          f"backend RTT dynamodb={args.dynamodb_ms}ms s3={args.s3_ms}ms")
+    print(f"{'mode':<15} {'hit rate':>9} {'304s':>6} {'ddb calls':>10} {'s3 calls':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'total s':>8}")
+    for label, r in results.items():
+        print(f"{label:<15} {r['hit_rate']:>9.1%} {r['not_modified']:>6} {r['dynamodb_calls']:>10} "
+              f"{r['s3_calls']:>9} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['total_ms'] / 1000:>8.2f}")
+
+    saved = results['no cache']['total_ms'] - results['ttl+lru cache']['total_ms']
+    print(f"Latency saved by the cache: {saved / 1000:.2f}s "
+          f"({saved / args.requests:.2f} ms per request)")
+
+
+if __name__ == '__main__':
+    main()
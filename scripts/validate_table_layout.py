@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Local check of the generated Athena DDL against sample order data.
+
+Validates that the DDL from glue_scripts/table_layout.py is well formed
+(columns, partition keys, projection properties, location template) and that
+sample orders - generated like data_generator, or captured raw-data files -
+fit the declared types and land in partitions the projection can reach.
+
+The data check does not need Spark: every table's rows are derived from the
+orders with the local stand-ins for the pipeline (order_fixtures,
+summary_tables.summarize_rows, approx_analytics), passed through the table's
+select_expressions() CASTs, written as JSON lines and read back against the
+declared columns. A column the data never fills, or a value the CAST would
+turn into NULL or truncate, is reported. Parquet encoding itself is only
+exercised by the Spark test in tests/test_table_layout.py.
+
+Usage:
+    python scripts/validate_table_layout.py
+    python scripts/validate_table_layout.py --input ./raw-data/orders
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'glue_scripts'))
+import table_layout  # noqa: E402
+from approx_analytics import approx_summaries, stratified_sample, unestimated_columns  # noqa: E402
+from summary_tables import summarize_rows  # noqa: E402
+from order_fixtures import load_orders, process_order, raw_orders, stream_order  # noqa: E402
+
+
+BUCKET = 'validation-bucket'
+ATHENA_TYPES = {'string', 'int', 'bigint', 'double', 'boolean', 'timestamp'}
+CAST = re.compile(r'^CAST\((?:`(\w+)`|NULL) AS (\w+)\) AS `(\w+)`$')
+
+# Raw order fields that pass through the ETL job into processed_orders unchanged
+PASSTHROUGH_FIELDS = [
+    'order_id', 'customer_id', 'customer_age', 'customer_location',
+    'is_returning_customer', 'is_prime_member', 'product_name', 'category',
+    'quantity', 'price', 'subtotal', 'discount_percentage', 'discount_amount',
+    'total_amount', 'payment_method', 'shipping_method', 'device_type',
+    'referral_source', 'promo_code_used', 'estimated_delivery_days',
+    'session_duration_seconds', 'items_viewed'
+]
+
+
+def parse_ddl(ddl):
+    """
+    Pull columns, partition keys, location and properties back out of the DDL text
+    """
+    body = re.search(r'\(\n(.*?)\n\)\n', ddl, re.S).group(1)
+    columns = re.findall(r'`(\w+)` (\w+)', body)
+    partitions = re.search(r'PARTITIONED BY \((.*?)\)\n', ddl)
+    location = re.search(r"LOCATION '(.*?)'", ddl).group(1)
+    properties = dict(re.findall(r"'([^']+)'='([^']*)'", ddl.split('TBLPROPERTIES', 1)[1]))
+    return {
+        'columns': columns,
+        'partitions': re.findall(r'`(\w+)` (\w+)', partitions.group(1)) if partitions else [],
+        'location': location,
+        'properties': properties
+    }
+
+
+def fits_type(value, data_type):
+    if value is None:
+        return True
+    if data_type == 'string':
+        return isinstance(value, str)
+    if data_type == 'boolean':
+        return isinstance(value, bool)
+    if data_type in ('int', 'bigint'):
+        limit = 2 ** 31 if data_type == 'int' else 2 ** 63
+        return isinstance(value, int) and not isinstance(value, bool) and -limit <= value < limit
+    if data_type == 'double':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if data_type == 'timestamp':
+        try:
+            datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+def cast_value(value, data_type):
+    """
+    Spark's CAST of a JSON value to a catalog type. Raises ValueError where
+    Spark would silently return NULL or drop a fraction.
+    """
+    if value is None:
+        return None
+    if data_type == 'string':
+        return str(value).lower() if isinstance(value, bool) else str(value)
+    if data_type == 'boolean':
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            return value.lower() == 'true'
+        if isinstance(value, (int, float)):
+            return value != 0
+    elif data_type in ('int', 'bigint'):
+        if isinstance(value, str):
+            value = int(value.strip())
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"{value!r} would be truncated")
+            value = int(value)
+        if isinstance(value, int) and fits_type(int(value), data_type):
+            return int(value)
+    elif data_type == 'double':
+        return float(value)
+    elif data_type == 'timestamp':
+        if fits_type(value, 'timestamp'):
+            return str(value)
+    raise ValueError(f"{value!r} is not a {data_type}")
+
+
+def select_rows(table_name, rows):
+    """
+    Evaluate the table's select_expressions() on dict rows; returns the
+    selected rows and the first problem found per column
+    """
+    available = set().union(*(row.keys() for row in rows)) if rows else set()
+    expressions = [CAST.match(e).groups()
+                   for e in table_layout.select_expressions(table_name, available)]
+    selected, problems = [], {}
+    for row in rows:
+        out = {}
+        for source, data_type, alias in expressions:
+            try:
+                out[alias] = cast_value(row.get(source) if source else None, data_type)
+            except ValueError as e:
+                problems.setdefault(alias, f"{table_name}.{alias}: CAST {e}")
+                out[alias] = None
+        selected.append(out)
+    return selected, problems
+
+
+def check_rows(table_name, rows, errors):
+    """
+    Write rows the way the pipeline does (select + CAST, JSON lines) and read
+    them back against the declared columns
+    """
+    keys = table_layout.partition_keys(table_name)
+    declared = [(n, t) for n, t in table_layout.table_columns(table_name) if n not in keys]
+    names = {name for name, _ in declared}
+
+    if table_name == 'raw_orders':
+        # Read as written by the stream processor; JsonSerDe maps keys to columns
+        written, problems = rows, {}
+        for key in sorted(set().union(*(row.keys() for row in rows)) - names if rows else ()):
+            problems[key] = f"raw_orders: field {key} has no column"
+    else:
+        written, problems = select_rows(table_name, rows)
+
+    lines = '\n'.join(json.dumps(row, default=str) for row in written)
+    filled = set()
+    for row in (json.loads(line) for line in lines.splitlines()):
+        for name, data_type in declared:
+            value = row.get(name)
+            if value is None:
+                continue
+            filled.add(name)
+            if not fits_type(value, data_type):
+                problems.setdefault(name, f"{table_name}.{name}: {value!r} does not fit {data_type}")
+    # Columns that are NULL by design: distinct counts (and their ratios) in
+    # approx_<table>, and margins of error of groups with few sample rows
+    optional = set()
+    if table_name.startswith('approx_'):
+        optional = unestimated_columns(table_name[len('approx_'):])
+        optional |= {name for name in names if name.endswith('_moe')}
+    if rows:
+        for name, _ in declared:
+            if name not in filled and name not in optional:
+                problems.setdefault(name, f"{table_name}.{name}: never filled by the data")
+
+    errors.extend(problems.values())
+    return len(written)
+
+
+def table_rows(orders, fraction=0.2):
+    """
+    Rows of every table as the pipeline would write them for these orders
+    """
+    stream = [stream_order(order, i) for i, order in enumerate(orders)]
+    processed = [process_order(order) for order in stream]
+    sample = stratified_sample(processed, fraction)
+    rows = {'raw_orders': stream, 'processed_orders': processed, 'orders_sample': sample}
+    rows.update(summarize_rows(processed))
+    rows.update({f'approx_{name}': table for name, table in approx_summaries(sample).items()})
+    return rows
+
+
+def check_ddl(table_name, errors, year_range=None):
+    ddl = table_layout.athena_ddl(table_name, BUCKET, 'validation_db', year_range)
+    parsed = parse_ddl(ddl)
+    expected = table_layout.table_columns(table_name)
+    keys = table_layout.partition_keys(table_name)
+
+    if parsed['columns'] + parsed['partitions'] != \
+            [c for c in expected if c[0] not in keys] + [c for c in expected if c[0] in keys]:
+        errors.append(f"{table_name}: DDL columns do not match the table layout")
+    for name, data_type in parsed['columns'] + parsed['partitions']:
+        if data_type not in ATHENA_TYPES:
+            errors.append(f"{table_name}.{name}: unsupported type {data_type}")
+    if len({name for name, _ in expected}) != len(expected):
+        errors.append(f"{table_name}: duplicate column names")
+    if parsed['location'] != table_layout.table_location(table_name, BUCKET):
+        errors.append(f"{table_name}: unexpected location {parsed['location']}")
+
+    properties = parsed['properties']
+    if keys:
+        if properties.get('projection.enabled') != 'true':
+            errors.append(f"{table_name}: partition projection is not enabled")
+        template = properties.get('storage.location.template', '')
+        for key in keys:
+            expected_type = table_layout.PARTITION_PROJECTION.get(key, {}).get('type', 'integer')
+            if properties.get(f'projection.{key}.type') != expected_type:
+                errors.append(f"{table_name}: no {expected_type} projection for {key}")
+            if f'${{{key}}}' not in template:
+                errors.append(f"{table_name}: location template does not reference {key}")
+    return parsed
+
+
+def check_orders(orders, parsed, errors):
+    """
+    Validate sample orders against the processed_orders DDL
+    """
+    declared = dict(parsed['columns'] + parsed['partitions'])
+    properties = parsed['properties']
+    ranges = {
+        key: tuple(int(v) for v in properties[f'projection.{key}.range'].split(','))
+        for key, _ in parsed['partitions']
+    }
+
+    for field in PASSTHROUGH_FIELDS:
+        if field not in declared:
+            errors.append(f"processed_orders: raw field {field} has no column")
+
+    paths = set()
+    for order in orders:
+        for field in PASSTHROUGH_FIELDS:
+            if field in declared and not fits_type(order.get(field), declared[field]):
+                errors.append(f"order {order.get('order_id')}: {field}={order.get(field)!r} "
+                              f"does not fit {declared[field]}")
+
+        if not fits_type(order.get('order_date'), 'timestamp'):
+            errors.append(f"order {order.get('order_id')}: unparseable order_date")
+            continue
+        order_date = datetime.fromisoformat(str(order['order_date']).replace('Z', '+00:00'))
+        values = {'order_year': order_date.year, 'order_month': order_date.month,
+                  'order_day': order_date.day}
+        for key, (low, high) in ranges.items():
+            if not low <= values[key] <= high:
+                errors.append(f"order {order.get('order_id')}: {key}={values[key]} "
+                              f"outside projection range {low},{high}")
+
+        # The path Athena resolves from the template must be the directory Spark's partitionBy writes
+        resolved = properties['storage.location.template']
+        for key, value in values.items():
+            resolved = resolved.replace(f'${{{key}}}', str(value))
+        spark_path = parsed['location'] + '/'.join(f'{k}={v}' for k, v in values.items())
+        if resolved != spark_path:
+            errors.append(f"order {order.get('order_id')}: projected path {resolved} "
+                          f"!= written path {spark_path}")
+        paths.add(resolved)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', nargs='*', default=[],
+                        help='Captured raw order files or directories (.json/.jsonl)')
+    parser.add_argument('--samples', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    orders = load_orders(args.input) if args.input else raw_orders(args.samples, args.seed)
+    errors = []
+
+    # The ETL job derives the order_year range from the years it writes
+    years = [datetime.fromisoformat(str(o['order_date']).replace('Z', '+00:00')).year
+             for o in orders if fits_type(o.get('order_date'), 'timestamp')]
+    year_range = table_layout.order_year_range(years)
+
+    parsed = {name: check_ddl(name, errors, year_range) for name in table_layout.table_names()}
+    paths = check_orders(orders, parsed['processed_orders'], errors)
+    rows = table_rows(orders)
+    written = sum(check_rows(name, rows.get(name, []), errors) for name in parsed)
+    for name in parsed:
+        if not rows.get(name):
+            errors.append(f"{name}: no sample rows to check")
+
+    for error in errors[:50]:
+        print(f"FAIL {error}")
+    if errors:
+        print(f"{len(errors)} problem(s) found")
+        sys.exit(1)
+
+    print(f"OK: {len(parsed)} tables, {len(orders)} sample orders across "
+          f"{len(paths)} projected partitions, {written} rows read back")
+
+
+if __name__ == '__main__':
+    main()
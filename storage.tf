@@ -116,15 +116,42 @@ resource "aws_dynamodb_table" "orders" {
     type = "S"
   }
 
-  attribute {
-    name = "customer_id"
-    type = "S"
+  # customer_id GSI: the only customer index while sharding is off, kept
+  # during a sharding migration until existing items have been backfilled
+  dynamic "attribute" {
+    for_each = local.orders_customer_index ? ["customer_id"] : []
+    content {
+      name = attribute.value
+      type = "S"
+    }
   }
 
-  global_secondary_index {
-    name            = "CustomerIdIndex"
-    hash_key        = "customer_id"
-    projection_type = "ALL"
+  dynamic "global_secondary_index" {
+    for_each = local.orders_customer_index ? ["CustomerIdIndex"] : []
+    content {
+      name            = global_secondary_index.value
+      hash_key        = "customer_id"
+      projection_type = "ALL"
+    }
+  }
+
+  # Write-sharded customer index (customer_id#N), see lambda_functions/customer_orders.py
+  dynamic "attribute" {
+    for_each = var.orders_write_shards > 0 ? ["customer_shard", "order_date"] : []
+    content {
+      name = attribute.value
+      type = "S"
+    }
+  }
+
+  dynamic "global_secondary_index" {
+    for_each = var.orders_write_shards > 0 ? ["CustomerShardIndex"] : []
+    content {
+      name            = global_secondary_index.value
+      hash_key        = "customer_shard"
+      range_key       = "order_date"
+      projection_type = "ALL"
+    }
   }
 
   point_in_time_recovery {
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lambda handlers, Glue scripts and helper scripts import their siblings as top-level modules
+for directory in ('lambda_functions', 'glue_scripts', 'scripts'):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+
+@pytest.fixture(scope='session')
+def spark():
+    """
+    Local SparkSession for the Glue script tests; skipped where Spark cannot start (e.g. no Java)
+    """
+    pytest.importorskip('pyspark')
+    from pyspark.sql import SparkSession
+    try:
+        session = SparkSession.builder.master('local[1]') \
+            .config('spark.sql.session.timeZone', 'UTC') \
+            .config('spark.ui.enabled', 'false') \
+            .getOrCreate()
+    except Exception as e:
+        pytest.skip(f'Spark unavailable: {e}')
+    yield session
+    session.stop()
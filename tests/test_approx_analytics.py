@@ -0,0 +1,173 @@
+from collections import Counter
+
+import pytest
+
+import query_api
+import table_layout
+from approx_analytics import (
+    MIN_MOE_ROWS, _expand, allocation, approx_summaries, estimate_summary, stratified_sample,
+    stratum_aggregates, unestimated_columns
+)
+from order_fixtures import processed_orders
+from summary_tables import SUMMARIES, SUMMARY_TABLES, build_summaries, summarize_rows
+
+
+def by_key(rows, table_name):
+    keys = SUMMARIES[table_name]['keys']
+    return {tuple(row[k] for k in keys): row for row in rows}
+
+
+def assert_same_tables(actual, expected, skip=lambda table_name: ()):
+    for table_name in SUMMARY_TABLES:
+        actual_rows = by_key(actual[table_name], table_name)
+        expected_rows = by_key(expected[table_name], table_name)
+        assert actual_rows.keys() == expected_rows.keys(), table_name
+        for key, row in expected_rows.items():
+            for column in set(row) - set(skip(table_name)):
+                assert actual_rows[key][column] == pytest.approx(row[column]), (table_name, column)
+
+
+def spec_columns(table_name):
+    spec = SUMMARIES[table_name]
+    return (spec['keys'] + [name for name, _, _ in spec['metrics']] +
+            [name for name, _, _ in spec['ratios']] + ([spec['rank'][0]] if 'rank' in spec else []))
+
+
+@pytest.mark.parametrize('table_name', SUMMARY_TABLES)
+def test_summary_spec_matches_catalog_reference_and_api(table_name):
+    columns = spec_columns(table_name)
+    catalog = [name for name, _ in table_layout.ANALYTICS_TABLE_COLUMNS[table_name]]
+    reference = summarize_rows(processed_orders(200, seed=1))[table_name]
+
+    assert catalog == columns
+    assert all(list(row) == columns for row in reference)
+    assert query_api.ANALYTICS_TABLES[table_name] == SUMMARIES[table_name]['keys']
+    assert query_api.ANALYTICS_TABLES[f'approx_{table_name}'] == SUMMARIES[table_name]['keys']
+
+
+def test_api_serves_exactly_the_written_tables():
+    written = SUMMARY_TABLES + [f'approx_{name}' for name in SUMMARY_TABLES]
+    assert sorted(query_api.ANALYTICS_TABLES) == sorted(written)
+
+
+def test_expand_matches_hand_computed_stratified_estimate():
+    # Stratum a: N=10, sample 1, 3; stratum b: N=4, sample 5, 5 (s^2 = 0)
+    strata = [(10, 2, 1.0 + 3.0, 1.0 + 9.0), (4, 2, 5.0 + 5.0, 25.0 + 25.0)]
+
+    total, variance = _expand(strata)
+
+    assert total == pytest.approx(10 / 2 * 4 + 4 / 2 * 10)
+    # N^2 (1 - n/N) s^2 / n with s^2 = 2 for stratum a
+    assert variance == pytest.approx(100 * (1 - 2 / 10) * 2 / 2)
+
+
+def test_expand_census_has_no_variance():
+    values = [float(i) for i in range(5)]
+    total, variance = _expand([(5, 5, sum(values), sum(v * v for v in values))])
+    assert (total, variance) == (10.0, 0.0)
+
+
+def test_summarize_rows_on_hand_rows():
+    rows = [
+        {'order_id': '1', 'customer_id': 'a', 'order_year': 2025, 'order_month': 6, 'order_day': 1,
+         'category': 'Audio', 'total_amount': 10.0, 'quantity': 1, 'is_discounted': True},
+        {'order_id': '2', 'customer_id': 'a', 'order_year': 2025, 'order_month': 6, 'order_day': 1,
+         'category': 'Audio', 'total_amount': 30.0, 'quantity': 2, 'is_discounted': False},
+        {'order_id': '3', 'customer_id': 'b', 'order_year': 2025, 'order_month': 6, 'order_day': 1,
+         'category': 'Office', 'total_amount': 5.0, 'quantity': 4, 'is_discounted': None},
+    ]
+    audio = by_key(summarize_rows(rows)['daily_category_summary'],
+                   'daily_category_summary')[(2025, 6, 1, 'Audio')]
+
+    assert audio == {'order_year': 2025, 'order_month': 6, 'order_day': 1, 'category': 'Audio',
+                     'total_orders': 2, 'unique_customers': 1, 'total_revenue': 40.0,
+                     'avg_order_value': 20.0, 'total_items_sold': 3, 'discounted_orders': 1}
+
+
+def test_census_estimates_equal_the_exact_tables():
+    rows = processed_orders(2000, seed=5)
+    census = stratified_sample(rows, fraction=1.0)
+    assert len(census) == len(rows)
+
+    estimated = approx_summaries(census)
+    assert_same_tables(estimated, summarize_rows(rows), skip=unestimated_columns)
+    for table_rows in estimated.values():
+        assert all(v in (0, None) for row in table_rows for k, v in row.items() if k.endswith('_moe'))
+
+
+def test_distinct_counts_and_their_ratios_are_not_estimated():
+    sample = stratified_sample(processed_orders(2000, seed=5), fraction=0.1)
+    daily = approx_summaries(sample, ['daily_summary'])['daily_summary']
+
+    assert unestimated_columns('daily_summary') == {'unique_customers', 'conversion_rate'}
+    assert all(row['unique_customers'] is None and row['conversion_rate'] is None
+               for row in daily)
+
+
+def test_margin_of_error_needs_enough_sample_rows():
+    sample = stratified_sample(processed_orders(20000, seed=9), fraction=0.05)
+    estimated = approx_summaries(sample)
+
+    for table_rows in estimated.values():
+        for row in table_rows:
+            has_margin = row['sample_rows'] >= MIN_MOE_ROWS
+            assert all((v is not None) == has_margin
+                       for k, v in row.items() if k.endswith('_moe')), row
+
+
+def test_estimates_only_need_the_stratum_aggregates():
+    sample = stratified_sample(processed_orders(3000, seed=21), fraction=0.1)
+    aggregates = stratum_aggregates(sample, 'customer_segments')
+
+    # One small row per (group, stratum), far fewer than the sample rows
+    assert len(aggregates) < len(sample)
+    assert estimate_summary(aggregates, 'customer_segments') == \
+        approx_summaries(sample, ['customer_segments'])['customer_segments']
+    assert sum(r['sample_rows'] for r in aggregates) == len(sample)
+
+
+def test_stratified_sample_takes_the_allocation_from_each_stratum():
+    rows = processed_orders(20000, seed=11)
+    sample = stratified_sample(rows, fraction=0.05, seed=3)
+
+    sizes = Counter(r['stratum_id'] for r in sample)
+    for row in sample:
+        expected = allocation(row['stratum_population'], 0.05, 2)
+        assert row['stratum_sample_size'] == sizes[row['stratum_id']] == expected
+        assert row['sample_weight'] == pytest.approx(row['stratum_population'] / expected)
+
+
+def test_spark_summaries_match_the_python_reference(spark):
+    rows = processed_orders(500, seed=13)
+    df = spark.createDataFrame(rows)
+
+    actual = {name: [r.asDict() for r in summary.collect()]
+              for name, summary in build_summaries(df).items()}
+    assert_same_tables(actual, summarize_rows(rows))
+
+
+def test_spark_sample_matches_the_allocation(spark):
+    from approx_analytics import build_stratified_sample
+
+    rows = processed_orders(5000, seed=17)
+    sample = build_stratified_sample(spark.createDataFrame(rows), 0.05).collect()
+
+    for row in sample:
+        assert row['stratum_sample_size'] == allocation(row['stratum_population'], 0.05, 2)
+
+
+def test_spark_stratum_aggregates_match_the_python_ones(spark):
+    from approx_analytics import build_stratum_aggregates
+
+    sample = stratified_sample(processed_orders(2000, seed=23), fraction=0.1)
+    df = spark.createDataFrame(sample)
+
+    for table_name in SUMMARY_TABLES:
+        actual = [r.asDict() for r in build_stratum_aggregates(df, table_name).collect()]
+        expected = stratum_aggregates(sample, table_name)
+        key = SUMMARIES[table_name]['keys'] + ['stratum_id']
+        actual = {tuple(r[k] for k in key): r for r in actual}
+        for row in expected:
+            got = actual[tuple(row[k] for k in key)]
+            for column, value in row.items():
+                assert got[column] == pytest.approx(value), (table_name, column)
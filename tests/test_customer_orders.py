@@ -0,0 +1,138 @@
+import pytest
+
+from customer_orders import (
+    CUSTOMER_INDEX_KEYS, SHARDED_INDEX_KEYS, SHARDED_INDEX_NAME, SHARD_KEY_ATTRIBUTE,
+    query_customer_orders, shard_key, validate_start_keys
+)
+
+
+class FakeTable:
+    """
+    Query on CustomerShardIndex / CustomerIdIndex with DynamoDB paging semantics
+    """
+
+    def __init__(self, orders):
+        self.queries = []
+        self.by_key = {}
+        for order in orders:
+            self.by_key.setdefault(('customer_id', order['customer_id']), []).append(order)
+            if SHARD_KEY_ATTRIBUTE in order:
+                self.by_key.setdefault(
+                    (SHARD_KEY_ATTRIBUTE, order[SHARD_KEY_ATTRIBUTE]), []).append(order)
+        for items in self.by_key.values():
+            items.sort(key=lambda o: (o['order_date'], o['order_id']), reverse=True)
+
+    def query(self, **params):
+        self.queries.append(params)
+        key = (params['ExpressionAttributeNames']['#pk'], params['ExpressionAttributeValues'][':pk'])
+        items = self.by_key.get(key, [])
+        start = 0
+        if 'ExclusiveStartKey' in params:
+            last_id = params['ExclusiveStartKey']['order_id']
+            start = next(i for i, o in enumerate(items) if o['order_id'] == last_id) + 1
+        limit = params.get('Limit', len(items))
+        page = items[start:start + limit]
+        response = {'Items': [dict(o) for o in page]}
+        if start + limit < len(items):
+            # CustomerShardIndex sorts on order_date; CustomerIdIndex has no sort key
+            names = SHARDED_INDEX_KEYS if key[0] == SHARD_KEY_ATTRIBUTE else CUSTOMER_INDEX_KEYS
+            response['LastEvaluatedKey'] = {name: page[-1][name] for name in names}
+        return response
+
+
+def make_orders(customer_id, count, shard_count):
+    orders = []
+    for i in range(count):
+        order_id = f'order-{i:04d}'
+        order = {'order_id': order_id, 'customer_id': customer_id,
+                 'order_date': f'2025-01-01T{i // 60:02d}:{i % 60:02d}:00'}
+        if shard_count:
+            order[SHARD_KEY_ATTRIBUTE] = shard_key(customer_id, order_id, shard_count)
+        orders.append(order)
+    return orders
+
+
+def read_all(table, customer_id, shard_count, limit):
+    pages, start_keys = [], None
+    while True:
+        items, start_keys = query_customer_orders(
+            table, customer_id, shard_count=shard_count, limit=limit, start_keys=start_keys)
+        pages.append(items)
+        if start_keys is None:
+            return pages
+        assert len(pages) < 1000
+
+
+def test_shard_key_is_stable_and_in_range():
+    keys = {shard_key('cust_1', f'order-{i}', 4) for i in range(200)}
+    assert keys == {f'cust_1#{n}' for n in range(4)}
+    assert shard_key('cust_1', 'order-7', 4) == shard_key('cust_1', 'order-7', 4)
+
+
+def test_sharded_pages_are_newest_first_across_pages():
+    orders = make_orders('cust_1', 97, 4)
+    table = FakeTable(orders)
+
+    pages = read_all(table, 'cust_1', 4, limit=10)
+
+    assert all(len(page) == 10 for page in pages[:-1])
+    dates = [item['order_date'] for page in pages for item in page]
+    assert dates == sorted((o['order_date'] for o in orders), reverse=True)
+    assert all(q['IndexName'] == SHARDED_INDEX_NAME for q in table.queries)
+
+
+def test_unsharded_pages_cover_every_order():
+    orders = make_orders('cust_1', 23, 0)
+    pages = read_all(FakeTable(orders), 'cust_1', 0, limit=5)
+
+    assert sorted(item['order_id'] for page in pages for item in page) == \
+        sorted(o['order_id'] for o in orders)
+
+
+def test_shard_without_emitted_items_keeps_its_start_key():
+    # Shard 0 only holds old orders: its first page is fetched but nothing
+    # from it makes the cut, so it must be re-read from the start next time
+    orders = [{'order_id': f'new-{i}', 'customer_id': 'c', 'customer_shard': 'c#1',
+               'order_date': f'2025-02-0{i + 1}'} for i in range(3)]
+    orders += [{'order_id': 'old', 'customer_id': 'c', 'customer_shard': 'c#0',
+                'order_date': '2024-01-01'}]
+    table = FakeTable(orders)
+
+    items, next_keys = query_customer_orders(table, 'c', shard_count=2, limit=2)
+
+    assert [i['order_id'] for i in items] == ['new-2', 'new-1']
+    assert next_keys[0] == {}
+    assert next_keys[1]['order_id'] == 'new-1'
+
+    items, next_keys = query_customer_orders(table, 'c', shard_count=2, limit=2,
+                                             start_keys=next_keys)
+    assert [i['order_id'] for i in items] == ['new-0', 'old']
+    assert next_keys is None
+
+
+@pytest.mark.parametrize('start_keys', [[{}], [{}, {}, {}, {}, {}], [{}, 'x', {}, {}], 'abc'])
+def test_start_keys_must_match_shard_count(start_keys):
+    with pytest.raises(ValueError):
+        validate_start_keys(start_keys, 4)
+    with pytest.raises(ValueError):
+        query_customer_orders(FakeTable([]), 'c', shard_count=4, limit=5, start_keys=start_keys)
+
+
+@pytest.mark.parametrize('shard_count, start_keys', [
+    (0, [{'bogus': 1}]),
+    (0, [{'order_id': 'order-0001'}]),
+    (0, [{'order_id': {'S': 'order-0001'}, 'customer_id': 'c'}]),
+    (0, [{'order_id': 'order-0001', 'customer_id': 'other'}]),
+    (2, [{}, {'order_id': 'o', SHARD_KEY_ATTRIBUTE: 'c#0', 'order_date': '2025-01-01'}]),
+    (2, [{}, {'order_id': 'o', SHARD_KEY_ATTRIBUTE: 'c#1'}]),
+])
+def test_start_keys_must_be_index_keys_of_this_customer(shard_count, start_keys):
+    with pytest.raises(ValueError):
+        validate_start_keys(start_keys, shard_count, 'c')
+
+
+def test_returned_keys_are_valid_start_keys():
+    for shard_count in (0, 3):
+        table = FakeTable(make_orders('c', 20, shard_count))
+        _, next_keys = query_customer_orders(table, 'c', shard_count=shard_count, limit=4)
+        validate_start_keys(next_keys, shard_count, 'c')
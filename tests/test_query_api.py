@@ -0,0 +1,131 @@
+import base64
+import io
+import json
+
+import pytest
+
+import query_api
+from query_api import TTLCache
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+        self.gets = 0
+
+    def list_objects_v2(self, Bucket, Prefix):
+        return {'Contents': [{'Key': key, 'Size': len(body), 'ETag': f'"{len(body)}"'}
+                             for key, body in self.objects.items() if key.startswith(Prefix)]}
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        return {'Body': io.BytesIO(self.objects[Key].encode('utf-8'))}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    rows = [
+        {'order_year': 2025, 'order_month': 6, 'order_day': 1, 'category': 'Audio', 'total_revenue': 10.0},
+        {'order_year': 2025, 'order_month': 6, 'order_day': 1, 'category': 'Office', 'total_revenue': 5.0},
+        {'order_year': 2025, 'order_month': 6, 'order_day': 2, 'category': 'Audio', 'total_revenue': 7.5},
+    ]
+    s3 = FakeS3({'analytics-results/api/daily_category_summary/part-00000.json':
+                 '\n'.join(json.dumps(r) for r in rows)})
+    monkeypatch.setenv('S3_BUCKET', 'test-bucket')
+    monkeypatch.setattr(query_api, '_s3', s3)
+    query_api.cache.clear()
+    yield s3
+    query_api.cache.clear()
+
+
+def get(path_params, params=None, headers=None):
+    return query_api.lambda_handler({'httpMethod': 'GET', 'pathParameters': path_params,
+                                     'queryStringParameters': params, 'headers': headers}, None)
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(query_api.time, 'monotonic', lambda: now[0])
+    cache = TTLCache(max_entries=4, ttl=10)
+
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    now[0] += 11
+    assert cache.get('a') is None
+    assert cache.get_stale('a') == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_ttl_cache_disabled_with_zero_entries():
+    cache = TTLCache(max_entries=0, ttl=60)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+def test_analytics_filters_by_date_and_category(api):
+    response = get({'table_name': 'daily_category_summary'},
+                   {'date': '2025-06-01', 'category': 'Audio'})
+    body = json.loads(response['body'])
+
+    assert response['statusCode'] == 200
+    assert [r['total_revenue'] for r in body['rows']] == [10.0]
+
+    # Other filters are served from the same cached table
+    response = get({'table_name': 'daily_category_summary'}, {'order_day': '02'})
+    assert json.loads(response['body'])['count'] == 1
+    assert response['headers']['X-Cache'] == 'HIT'
+    assert api.gets == 1
+
+
+def test_filtered_response_revalidates_with_etag(api):
+    first = get({'table_name': 'daily_category_summary'}, {'date': '2025-06-01'})
+    second = get({'table_name': 'daily_category_summary'}, {'date': '2025-06-01'},
+                 {'If-None-Match': first['headers']['ETag']})
+    assert second['statusCode'] == 304
+
+
+@pytest.mark.parametrize('params', [{'date': '06/01/2025'}, {'total_revenue': '10'}])
+def test_analytics_rejects_unknown_filters(api, params):
+    response = get({'table_name': 'daily_category_summary'}, params)
+    assert response['statusCode'] == 400
+
+
+def test_errors_are_not_cacheable(api):
+    ok = get({'table_name': 'daily_category_summary'})
+    missing = get({'table_name': 'no_such_table'})
+
+    assert ok['headers']['Cache-Control'].startswith('private, max-age=')
+    assert missing['statusCode'] == 404
+    assert missing['headers']['Cache-Control'] == 'no-store'
+
+
+def test_token_for_another_shard_count_is_rejected(monkeypatch):
+    monkeypatch.setenv('ORDERS_READ_SHARDS', '4')
+    token = base64.urlsafe_b64encode(json.dumps([{}] * 5).encode()).decode()
+
+    response = get({'customer_id': 'cust_1'}, {'next_token': token})
+    assert response['statusCode'] == 400
+    assert response['headers']['Cache-Control'] == 'no-store'
+
+
+@pytest.mark.parametrize('start_keys', [
+    [{'bogus': 1}],
+    [{'order_id': 'o1', 'customer_id': 'cust_2'}],
+])
+def test_unsharded_token_must_hold_this_customers_index_keys(monkeypatch, start_keys):
+    monkeypatch.setenv('ORDERS_READ_SHARDS', '0')
+    token = base64.urlsafe_b64encode(json.dumps(start_keys).encode()).decode()
+
+    response = get({'customer_id': 'cust_1'}, {'next_token': token})
+    assert response['statusCode'] == 400
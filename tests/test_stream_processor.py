@@ -0,0 +1,65 @@
+import base64
+import json
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+
+import stream_processor  # noqa: E402
+from customer_orders import SHARD_KEY_ATTRIBUTE, shard_key  # noqa: E402
+
+
+class FakeTable:
+    def __init__(self):
+        self.items = []
+
+    def put_item(self, Item):
+        self.items.append(Item)
+
+
+class FakeDynamoDB:
+    def __init__(self, table):
+        self.table = table
+
+    def Table(self, name):
+        return self.table
+
+
+class FakeS3:
+    def put_object(self, **kwargs):
+        pass
+
+
+def kinesis_event(orders):
+    return {'Records': [
+        {'kinesis': {'sequenceNumber': str(i), 'partitionKey': order.get('customer_id', ''),
+                     'data': base64.b64encode(json.dumps(order).encode()).decode()}}
+        for i, order in enumerate(orders)
+    ]}
+
+
+@pytest.fixture
+def orders_table(monkeypatch):
+    table = FakeTable()
+    monkeypatch.setenv('S3_BUCKET', 'bucket')
+    monkeypatch.setenv('DYNAMODB_ORDERS_TABLE', 'orders')
+    monkeypatch.setenv('ORDERS_WRITE_SHARDS', '4')
+    monkeypatch.setattr(stream_processor.boto3, 'client', lambda name: FakeS3())
+    monkeypatch.setattr(stream_processor.boto3, 'resource', lambda name: FakeDynamoDB(table))
+    return table
+
+
+def test_sharded_write_stamps_customer_shard(orders_table):
+    order = {'order_id': 'o1', 'customer_id': 'cust_1000',
+             'order_date': '2026-10-19T12:00:00', 'total_amount': 10.0}
+    stream_processor.lambda_handler(kinesis_event([order]), None)
+
+    assert orders_table.items[0][SHARD_KEY_ATTRIBUTE] == shard_key('cust_1000', 'o1', 4)
+
+
+def test_order_without_customer_is_still_stored(orders_table):
+    order = {'order_id': 'o2', 'order_date': '2026-10-19T12:00:00', 'total_amount': 10.0}
+    stream_processor.lambda_handler(kinesis_event([order]), None)
+
+    assert [item['order_id'] for item in orders_table.items] == ['o2']
+    assert SHARD_KEY_ATTRIBUTE not in orders_table.items[0]
@@ -0,0 +1,120 @@
+from datetime import date
+
+import pytest
+
+import table_layout
+from table_layout import glue_table_input, order_year_range, select_expressions
+from order_fixtures import processed_orders, raw_orders
+from validate_table_layout import CAST, PASSTHROUGH_FIELDS, check_rows, fits_type, table_rows
+
+
+def catalog_schema(table_name):
+    """
+    (name, type) pairs of a table as registered: data columns, then partition keys
+    """
+    table_input = glue_table_input(table_name, 'test-bucket')
+    return [(c['Name'], c['Type']) for c in
+            table_input['StorageDescriptor']['Columns'] + table_input['PartitionKeys']]
+
+
+def written_schema(table_name, columns):
+    """
+    Columns of the parquet output in catalog order (partitionBy moves partition keys to the path)
+    """
+    keys = table_layout.partition_keys(table_name)
+    return [c for c in columns if c[0] not in keys] + [c for c in columns if c[0] in keys]
+
+
+@pytest.mark.parametrize('table_name', [t for t in table_layout.table_names() if t != 'raw_orders'])
+def test_select_expressions_produce_the_catalog_schema(table_name):
+    columns = [name for name, _ in table_layout.table_columns(table_name)]
+    expressions = select_expressions(table_name, columns[::2])
+
+    selected = []
+    for expression in expressions:
+        source, data_type, alias = CAST.match(expression).groups()
+        assert source in (None, alias)
+        selected.append((alias, data_type))
+
+    assert written_schema(table_name, selected) == catalog_schema(table_name)
+
+
+def test_select_expressions_fill_missing_columns_with_typed_nulls():
+    expressions = select_expressions('daily_category_summary', ['category', 'unexpected'])
+
+    assert 'CAST(`category` AS string) AS `category`' in expressions
+    assert 'CAST(NULL AS bigint) AS `total_orders`' in expressions
+    assert not any('unexpected' in e for e in expressions)
+
+
+def test_sample_orders_fit_the_catalog_types():
+    processed = dict(table_layout.table_columns('processed_orders'))
+    raw = dict(table_layout.table_columns('raw_orders'))
+
+    for order in raw_orders(200, seed=7):
+        for field in PASSTHROUGH_FIELDS:
+            assert fits_type(order[field], processed[field]), field
+        for field, value in order.items():
+            assert fits_type(value, raw[field]), field
+
+
+@pytest.fixture(scope='module')
+def pipeline_rows():
+    return table_rows(raw_orders(300, seed=11))
+
+
+@pytest.mark.parametrize('table_name', table_layout.table_names())
+def test_written_rows_read_back_against_the_declared_columns(pipeline_rows, table_name):
+    errors = []
+    assert check_rows(table_name, pipeline_rows[table_name], errors) > 0
+    assert errors == []
+
+
+def test_read_back_reports_drifted_columns(pipeline_rows, monkeypatch):
+    columns = [('order_sizes', 'string') if name == 'order_size' else (name, data_type)
+               for name, data_type in table_layout.RAW_ORDERS_COLUMNS]
+    monkeypatch.setattr(table_layout, 'RAW_ORDERS_COLUMNS', columns)
+    processed = [('price', 'int') if name == 'price' else (name, data_type)
+                 for name, data_type in table_layout.PROCESSED_ORDERS_COLUMNS]
+    monkeypatch.setattr(table_layout, 'PROCESSED_ORDERS_COLUMNS', processed)
+
+    errors = []
+    check_rows('raw_orders', pipeline_rows['raw_orders'], errors)
+    check_rows('processed_orders', pipeline_rows['processed_orders'], errors)
+
+    assert 'raw_orders: field order_size has no column' in errors
+    assert 'raw_orders.order_sizes: never filled by the data' in errors
+    assert any(e.startswith('processed_orders.price: CAST') for e in errors)
+
+
+def test_order_year_range_covers_data_and_never_narrows():
+    assert order_year_range([2023, 2025, None]) == '2023,2025'
+    assert order_year_range([2026], '2019,2024') == '2019,2026'
+    assert order_year_range([2020], '2019,2024') == '2019,2024'
+    assert order_year_range([]) == f'{date.today().year},{date.today().year}'
+
+
+def test_projection_templates_match_the_written_paths():
+    processed = table_layout.table_parameters('processed_orders', 'b', '2024,2025')
+    raw = table_layout.table_parameters('raw_orders', 'b')
+
+    assert processed['projection.order_year.range'] == '2024,2025'
+    assert processed['storage.location.template'] == \
+        's3://b/processed-data/processed_orders/' \
+        'order_year=${order_year}/order_month=${order_month}/order_day=${order_day}'
+    # stream_processor.py writes processed-data/orders/YYYY/MM/DD/batch_*.jsonl
+    assert raw['storage.location.template'] == 's3://b/processed-data/orders/${dt}'
+    assert raw['projection.dt.format'] == 'yyyy/MM/dd'
+    assert table_layout.table_location('processed_orders', 'b') != \
+        table_layout.table_location('raw_orders', 'b')
+
+
+def test_spark_select_matches_glue_table_input(spark):
+    rows = processed_orders(50, seed=3)
+    df = spark.createDataFrame(rows)
+
+    final = df.selectExpr(*select_expressions('processed_orders', df.columns))
+    selected = [(field.name, field.dataType.simpleString()) for field in final.schema.fields]
+
+    assert written_schema('processed_orders', selected) == catalog_schema('processed_orders')
+    assert final.count() == len(rows)
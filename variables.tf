@@ -38,3 +38,49 @@ variable "alert_email" {
 
 }
 
+
+variable "orders_write_shards" {
+  description = "Number of customer_id#N write shards for the orders CustomerShardIndex GSI (0 disables sharding)"
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.orders_write_shards >= 0 && var.orders_write_shards <= 32
+    error_message = "orders_write_shards must be between 0 and 32."
+  }
+}
+
+variable "orders_shard_migration" {
+  description = "Keep CustomerIdIndex and read from it while existing orders are backfilled with customer_shard (see readme)"
+  type        = bool
+  default     = false
+}
+
+variable "query_cache_ttl_seconds" {
+  description = "TTL of the query API's in-container response cache"
+  type        = number
+  default     = 60
+}
+
+variable "query_cache_max_entries" {
+  description = "Maximum number of responses kept in the query API's in-container LRU cache"
+  type        = number
+  default     = 256
+}
+
+variable "approx_sample_fraction" {
+  description = "Fraction of each date x category x segment stratum kept in the approximate-analytics sample (0 disables it, e.g. 0.05 to enable)"
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.approx_sample_fraction >= 0 && var.approx_sample_fraction <= 0.2
+    error_message = "approx_sample_fraction must be between 0 and 0.2 (MAX_SAMPLE_FRACTION in glue_scripts/approx_analytics.py); use the exact tables beyond that."
+  }
+}
+
+variable "approx_only" {
+  description = "Skip the exact summary tables and only refresh the approx_* estimates (needs approx_sample_fraction > 0)"
+  type        = bool
+  default     = false
+}